@@ -1,115 +1,1098 @@
 import customtkinter as ctk
 import subprocess
 import os
+import sys
+import signal
+import argparse
+import atexit
+import bisect
+import dataclasses
+import json
 import threading
+import hashlib
+import io
+import itertools
+import queue
+import re
+import shlex
+import shutil
+import sqlite3
+import time
+import zipfile
 import requests
+from collections import OrderedDict, deque
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, urljoin
 from PIL import Image
-from tkinter import messagebox
-from typing import List, Dict
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from tkinter import messagebox, TclError
+from typing import List, Dict, Optional
 
 # Set appearance mode and default color theme
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+# Local state (history, caches) lives in the user's home directory
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".ani-cli-gui")
+
+def _default_bash_path() -> str:
+    if sys.platform == "win32":
+        return r"C:\Program Files\Git\bin\bash.exe"
+    return "/bin/bash"
+
+def _default_vlc_path() -> str:
+    # Only Git Bash needs VLC added to PATH; elsewhere it is usually on PATH already
+    return "/c/Program Files/VideoLAN/VLC" if sys.platform == "win32" else ""
+
+def _setting(default, label, section, minimum=None, maximum=None, choices=None, **kwargs):
+    """Declare a settings field with a label for the settings dialog and its valid values"""
+    metadata = {'label': label, 'section': section, 'minimum': minimum, 'maximum': maximum, 'choices': choices}
+    if callable(default):
+        return dataclasses.field(default_factory=default, metadata=metadata, **kwargs)
+    return dataclasses.field(default=default, metadata=metadata, **kwargs)
+
+@dataclasses.dataclass
+class Settings:
+    """Tunable paths and performance knobs, loaded once at startup"""
+    # Playback
+    bash_path: str = _setting(_default_bash_path, "Bash path", "Playback")
+    vlc_path: str = _setting(_default_vlc_path, "VLC directory (added to PATH)", "Playback")
+    provider: int = _setting(1, "ani-cli provider (-S)", "Playback", minimum=1)
+    quality: str = _setting("best", "Quality (-q)", "Playback")
+    use_vlc: bool = _setting(True, "Play with VLC (-v)", "Playback")
+    kill_timeout: float = _setting(3.0, "Stop grace period before force kill (s)", "Playback", minimum=0)
+    # Downloads
+    download_dir: str = _setting(lambda: os.path.join(os.path.expanduser("~"), "Videos", "Anime"),
+                                 "Download directory", "Downloads")
+    library_poll_interval: float = _setting(5.0, "Library rescan interval (s)", "Downloads", minimum=0.5)
+    download_engine: bool = _setting(True, "Download with built-in engine (resumable)", "Downloads")
+    download_workers: int = _setting(4, "Parallel segment downloads", "Downloads", minimum=1)
+    download_rate_limit: int = _setting(0, "Bandwidth cap in KB/s (0 = unlimited)", "Downloads", minimum=0)
+    stream_referer: str = _setting("https://allmanga.to", "Referer sent with stream requests", "Downloads")
+    # Interface
+    episodes_per_page: int = _setting(25, "Episodes per page", "Interface", minimum=1)
+    search_limit: int = _setting(10, "Search results per provider", "Interface", minimum=1)
+    image_width: int = _setting(80, "Cover width", "Interface", minimum=1)
+    image_height: int = _setting(120, "Cover height", "Interface", minimum=1)
+    prefetch_top_results: int = _setting(3, "Results to prefetch after a search", "Interface", minimum=0)
+    # Network
+    request_timeout: float = _setting(10.0, "Max request timeout (s)", "Network", minimum=0.1)
+    min_request_timeout: float = _setting(2.0, "Min request timeout (s)", "Network", minimum=0.1)
+    search_deadline: float = _setting(4.0, "Search deadline (s)", "Network", minimum=0.1)
+    circuit_cooldown: float = _setting(30.0, "Unhealthy host cooldown (s)", "Network", minimum=0)
+    http_mode: str = _setting("live", "HTTP mode (live, record, replay, offline)", "Network",
+                              choices=('live', 'record', 'replay', 'offline'))
+    fixture_archive: str = _setting(lambda: os.path.join(DATA_DIR, "fixtures.zip"), "HTTP fixture archive", "Network")
+    fixture_latency: float = _setting(-1.0, "Replay latency in s (-1 = as recorded)", "Network", minimum=-1)
+    # Concurrency
+    search_workers: int = _setting(6, "Search threads", "Concurrency", minimum=1)
+    prefetch_jobs_per_minute: int = _setting(12, "Prefetch jobs per minute", "Concurrency", minimum=1)
+    playlist_workers: int = _setting(4, "Parallel stream lookups for playlists", "Concurrency", minimum=1)
+    # Cache
+    cache_max_entries: int = _setting(512, "Cache entries", "Cache", minimum=1)
+    episode_count_ttl: int = _setting(6 * 60 * 60, "Episode data TTL (s)", "Cache", minimum=0)
+    airing_grace_period: int = _setting(10 * 60, "Wait after air time (s)", "Cache", minimum=0)
+    # Daemon
+    daemon_host: str = _setting("127.0.0.1", "Daemon address", "Daemon")
+    daemon_port: int = _setting(8765, "Daemon port", "Daemon", minimum=0, maximum=65535)
+
+    ENV_PREFIX = "ANI_CLI_GUI_"
+
+    def __post_init__(self):
+        self.path = self.default_path()
+        self.file_values = {}  # As read from the settings file
+        self.env_values = {}  # Applied from ANI_CLI_GUI_* variables, not saved
+
+    @classmethod
+    def default_path(cls) -> str:
+        return os.path.join(DATA_DIR, "settings.json")
+
+    @classmethod
+    def load(cls, path=None):
+        """Load settings from the config file, then apply environment overrides"""
+        settings = cls()
+        path = path or cls.default_path()
+        settings.path = path
+        
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    values = json.load(f)
+                if not isinstance(values, dict):
+                    raise ValueError("expected a JSON object")
+                settings.file_values = values
+                # Invalid values are reported and keep their defaults
+                settings.update(settings.file_values)
+            except (OSError, ValueError) as e:
+                print(f"Error reading settings from {path}: {e}")
+        
+        # ANI_CLI_GUI_EPISODES_PER_PAGE=50 and friends win over the file
+        overrides = {}
+        for field in dataclasses.fields(cls):
+            env_value = os.environ.get(cls.ENV_PREFIX + field.name.upper())
+            if env_value is not None:
+                overrides[field.name] = env_value
+        settings.update(overrides)
+        settings.env_values = {name: getattr(settings, name) for name in overrides}
+        return settings
+
+    def update(self, values: Dict) -> List[str]:
+        """Set fields from a dict, converting strings to each field's type; returns errors"""
+        fields = {field.name: field for field in dataclasses.fields(self)}
+        errors = []
+        for name, value in values.items():
+            if name not in fields:
+                print(f"Ignoring unknown setting: {name}")
+                continue
+            try:
+                setattr(self, name, self._validate(self._convert(value, fields[name].type), fields[name].metadata))
+            except (TypeError, ValueError) as e:
+                print(f"Invalid value for setting {name}: {e}")
+                errors.append(f"{name}: {e}")
+        return errors
+
+    @staticmethod
+    def _validate(value, metadata):
+        minimum, maximum, choices = metadata.get('minimum'), metadata.get('maximum'), metadata.get('choices')
+        if minimum is not None and value < minimum:
+            raise ValueError(f"must be at least {minimum}, got {value}")
+        if maximum is not None and value > maximum:
+            raise ValueError(f"must be at most {maximum}, got {value}")
+        if choices and value not in choices:
+            raise ValueError(f"must be one of {', '.join(choices)}, got {value!r}")
+        return value
+
+    @staticmethod
+    def _convert(value, field_type):
+        if field_type in (bool, 'bool'):
+            if isinstance(value, str):
+                if value.strip().lower() in ('1', 'true', 'yes', 'on'):
+                    return True
+                if value.strip().lower() in ('0', 'false', 'no', 'off'):
+                    return False
+                raise ValueError(f"expected true/false, got {value!r}")
+            return bool(value)
+        if field_type in (int, 'int'):
+            return int(value)
+        if field_type in (float, 'float'):
+            return float(value)
+        return str(value)
+
+    def save(self, path=None):
+        path = path or self.path
+        values = dataclasses.asdict(self)
+        
+        # Environment overrides are per session; keep the file's own value unless it was edited
+        for name, env_value in self.env_values.items():
+            if values[name] == env_value:
+                if name in self.file_values:
+                    values[name] = self.file_values[name]
+                else:
+                    del values[name]
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(values, f, indent=2)
+        self.file_values = values
+
+def expand_episode_spec(spec: str) -> List[int]:
+    """Expand an ani-cli episode argument ("3", "1-5", "1 4 7") into episode numbers"""
+    numbers = []
+    for part in spec.replace(',', ' ').split():
+        try:
+            if '-' in part:
+                start, end = part.split('-', 1)
+                numbers.extend(range(int(start), int(end) + 1))
+            else:
+                numbers.append(int(part))
+        except ValueError:
+            continue
+    return [number for number in numbers if number >= 1]
+
+def episode_ranges(numbers: List[int]) -> List[str]:
+    """Collapse episode numbers into ani-cli episode arguments, one per consecutive run"""
+    ranges = []
+    for number in sorted(set(numbers)):
+        if ranges and ranges[-1][1] == number - 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return [str(start) if start == end else f"{start}-{end}" for start, end in ranges]
+
+def normalize_title(title: str) -> str:
+    """Normalize a title for matching across providers and file names"""
+    return re.sub(r'[^a-z0-9]', '', (title or '').lower())
+
+EPISODE_SPEC_PATTERN = re.compile(r'^[0-9 ,-]+$')
+
+def validate_episode_spec(spec: str) -> str:
+    """Return an ani-cli episode argument, or raise ValueError if it isn't numbers and ranges"""
+    spec = str(spec).strip()
+    if not EPISODE_SPEC_PATTERN.match(spec):
+        raise ValueError(f"Invalid episode(s): {spec!r}, use e.g. 3, 1-5 or 1 4 7")
+    return spec
+
+def _export_vlc_path(settings) -> List[str]:
+    """Shell prefix that puts the configured VLC directory on PATH"""
+    if not settings.vlc_path:
+        return []
+    return [f'export PATH="$PATH":{shlex.quote(settings.vlc_path)};']
+
+def build_ani_cli_command(anime_name: str, episode: str = "1", download: bool = False, settings=None,
+                          use_player: bool = True) -> str:
+    """Build the ani-cli shell command for an anime and episode(s)"""
+    settings = settings or Settings()
+    episode = validate_episode_spec(episode)
+    
+    # Every value is quoted: titles and episodes can come from daemon clients
+    cmd_parts = _export_vlc_path(settings)
+    cmd_parts += [
+        'ani-cli',
+        '-S', shlex.quote(str(settings.provider)),  # Provider (1 is usually fastest)
+        '-q', shlex.quote(settings.quality),
+        '-e', shlex.quote(episode)
+    ]
+    if settings.use_vlc and use_player:
+        cmd_parts.append('-v')  # Use VLC player
+    cmd_parts.append(shlex.quote(anime_name))
+    
+    # Add download option if selected
+    if download:
+        cmd_parts.insert(-1, '-d')
+    
+    return ' '.join(cmd_parts)
+
+def build_local_play_command(paths: List[str], settings=None) -> str:
+    """Build a shell command that plays already downloaded files"""
+    settings = settings or Settings()
+    
+    cmd_parts = _export_vlc_path(settings)
+    cmd_parts.append('vlc' if settings.use_vlc else 'mpv')
+    cmd_parts += [shlex.quote(path) for path in paths]
+    return ' '.join(cmd_parts)
+
+def build_playlist_play_command(playlist_path: str, settings=None) -> str:
+    """Build a shell command that plays a whole .m3u playlist in one player"""
+    settings = settings or Settings()
+    
+    cmd = build_local_play_command([playlist_path], settings)
+    if not settings.use_vlc and settings.stream_referer:
+        # mpv ignores #EXTVLCOPT lines, so pass the referer on the command line
+        cmd += ' ' + shlex.quote(f'--referrer={settings.stream_referer}')
+    return cmd
+
+def write_playlist(path: str, entries: List[tuple], referer: str = None) -> str:
+    """Write (title, url or file path) entries to an extended M3U playlist"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("#EXTM3U\n")
+        for title, location in entries:
+            title, location = (' '.join(value.splitlines()) for value in (title, location))
+            f.write(f"#EXTINF:-1,{title}\n")
+            if referer and '\n' not in referer and location.startswith(('http://', 'https://')):
+                f.write(f"#EXTVLCOPT:http-referrer={referer}\n")
+            f.write(f"{location}\n")
+    return path
+
+class EpisodeView:
+    """Lightweight view of one episode, only built for rows that are on screen"""
+    __slots__ = ('number', 'title', 'url', 'site', 'available', 'downloaded')
+
+    def __init__(self, number, title=None, url='', site='basic', available=False, downloaded=False):
+        self.number = number
+        self.title = title or f"Episode {number}"
+        self.url = url
+        self.site = site
+        self.available = available
+        self.downloaded = downloaded
+
+class EpisodeAvailability:
+    """Per-show episode state stored as bitsets (bit n-1 is episode n)"""
+
+    def __init__(self, total_episodes: int = 0, available_mask: int = 0, downloaded_mask: int = 0):
+        self.total_episodes = 0
+        self.released = 0
+        self.available = available_mask
+        self.downloaded = downloaded_mask
+        self.set_released(total_episodes)
+
+    def set_released(self, total_episodes: int):
+        """Mark episodes 1..total_episodes as released"""
+        self.total_episodes = max(0, total_episodes or 0)
+        self.released = (1 << self.total_episodes) - 1
+
+    @staticmethod
+    def mask_from_numbers(numbers) -> int:
+        """Build a bitmask from an iterable of episode numbers"""
+        mask = 0
+        for number in numbers:
+            if number >= 1:
+                mask |= 1 << (number - 1)
+        return mask
+
+    def is_released(self, number: int) -> bool:
+        return number >= 1 and bool((self.released >> (number - 1)) & 1)
+
+    def is_available(self, number: int) -> bool:
+        return number >= 1 and bool((self.available >> (number - 1)) & 1)
+
+    def is_downloaded(self, number: int) -> bool:
+        return number >= 1 and bool((self.downloaded >> (number - 1)) & 1)
+
+    def has_provider_data(self) -> bool:
+        """Whether availability on a streaming provider is known at all"""
+        return self.available != 0
+
+    def available_count(self) -> int:
+        return bin(self.available & self.released).count('1')
+
+    def iter_views(self, start: int, end: int, site: str = 'basic'):
+        """Yield episode views for the visible range only"""
+        start = max(1, start)
+        end = min(end, self.total_episodes)
+        for number in range(start, end + 1):
+            yield EpisodeView(number, site=site,
+                              available=self.is_available(number),
+                              downloaded=self.is_downloaded(number))
+
+class WatchHistory:
+    """Local watch history backed by SQLite"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(DATA_DIR, "history.db")
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.lock, self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS shows (
+                    mal_id INTEGER PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    episodes INTEGER,
+                    score REAL,
+                    year INTEGER,
+                    image_url TEXT,
+                    last_episode INTEGER,
+                    last_watched REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_shows_last_watched ON shows (last_watched);
+                CREATE TABLE IF NOT EXISTS watched (
+                    mal_id INTEGER NOT NULL,
+                    episode INTEGER NOT NULL,
+                    watched_at REAL NOT NULL,
+                    PRIMARY KEY (mal_id, episode)
+                ) WITHOUT ROWID;
+            """)
+
+    def record(self, anime: Dict, episodes: List[int]):
+        """Record that episodes of an anime were started"""
+        mal_id = anime.get('mal_id')
+        if not mal_id or not episodes:
+            return
+        
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                """INSERT INTO shows (mal_id, title, episodes, score, year, image_url, last_episode, last_watched)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (mal_id) DO UPDATE SET
+                       title = excluded.title,
+                       episodes = COALESCE(excluded.episodes, shows.episodes),
+                       score = COALESCE(excluded.score, shows.score),
+                       year = COALESCE(excluded.year, shows.year),
+                       image_url = COALESCE(excluded.image_url, shows.image_url),
+                       last_episode = excluded.last_episode,
+                       last_watched = excluded.last_watched""",
+                (mal_id, anime.get('title', 'Unknown'), anime.get('episodes'), anime.get('score'),
+                 anime.get('year'), anime.get('image_url'), episodes[-1], now)
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO watched (mal_id, episode, watched_at) VALUES (?, ?, ?)",
+                [(mal_id, episode, now) for episode in episodes]
+            )
+
+    def next_unwatched_episode(self, mal_id: int) -> Optional[int]:
+        """Episode after the highest one watched, or None if nothing was watched"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MAX(episode) FROM watched WHERE mal_id = ?", (mal_id,)
+            ).fetchone()
+        if not row or row[0] is None:
+            return None
+        return row[0] + 1
+
+    def recently_watched(self, limit: int = 10) -> List[Dict]:
+        """Most recently watched shows, newest first"""
+        with self.lock:
+            rows = self.conn.execute(
+                """SELECT mal_id, title, episodes, score, year, image_url, last_episode
+                   FROM shows ORDER BY last_watched DESC LIMIT ?""",
+                (limit,)
+            ).fetchall()
+        
+        return [
+            {
+                'mal_id': mal_id,
+                'title': title,
+                'episodes': episodes,
+                'score': score,
+                'year': year,
+                'image_url': image_url,
+                'last_episode': last_episode
+            }
+            for mal_id, title, episodes, score, year, image_url, last_episode in rows
+        ]
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+class HostHealth:
+    """Rolling error rate, latency EWMA and circuit breaker for one upstream host"""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, host: str, window: int = 20, failure_threshold: float = 0.5,
+                 min_requests: int = 4, cooldown: float = 30.0,
+                 min_timeout: float = 2.0, max_timeout: float = 10.0):
+        self.host = host
+        self.outcomes = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.min_requests = min_requests
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.latency_ewma = None
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent now; half-open lets one trial through"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.time() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self.trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def probe_due(self) -> bool:
+        with self.lock:
+            return self.state == self.OPEN and time.time() - self.opened_at >= self.cooldown
+
+    def record_success(self, latency: float):
+        with self.lock:
+            self.outcomes.append(True)
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * latency
+            if self.state != self.CLOSED:
+                print(f"{self.host} is healthy again")
+                self.state = self.CLOSED
+                self.cooldown = self.base_cooldown
+                self.outcomes.clear()
+                self.outcomes.append(True)
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.outcomes.append(False)
+            self.trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                # Failed trial: back off for longer before the next one
+                self.cooldown = min(self.cooldown * 2, 10 * 60)
+                self._open()
+            elif self.state == self.CLOSED and len(self.outcomes) >= self.min_requests \
+                    and self.error_rate() >= self.failure_threshold:
+                self._open()
+
+    def release_trial(self):
+        """Give back a half-open trial that ended without an outcome for the host"""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def _open(self):
+        print(f"{self.host} is unhealthy, skipping it for {self.cooldown:.0f}s")
+        self.state = self.OPEN
+        self.opened_at = time.time()
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def timeout(self) -> float:
+        """Request timeout adapted to the latency this host has shown so far"""
+        if self.latency_ewma is None:
+            return self.max_timeout
+        return max(self.min_timeout, min(self.max_timeout, self.latency_ewma * 4 + 1))
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {
+                'host': self.host,
+                'state': self.state,
+                'error_rate': round(self.error_rate(), 2),
+                'latency_ewma': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+                'timeout': round(self.timeout(), 2)
+            }
+
+class HealthTracker:
+    """Per-host health, with a background thread probing hosts whose circuit is open"""
+
+    def __init__(self, session, settings=None, probe_interval: float = 5.0):
+        self.session = session
+        self.settings = settings or Settings()
+        self.probe_interval = probe_interval
+        self.hosts = {}
+        self.lock = threading.Lock()
+        self.probe_thread = None
+
+    def get(self, host: str) -> HostHealth:
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostHealth(
+                    host,
+                    cooldown=self.settings.circuit_cooldown,
+                    min_timeout=self.settings.min_request_timeout,
+                    max_timeout=self.settings.request_timeout
+                )
+            return self.hosts[host]
+
+    def ensure_prober(self):
+        """Start the probe thread the first time any circuit opens"""
+        with self.lock:
+            if self.probe_thread is None:
+                self.probe_thread = threading.Thread(target=self._probe_loop, daemon=True)
+                self.probe_thread.start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.probe_interval)
+            with self.lock:
+                hosts = list(self.hosts.values())
+            for health in hosts:
+                if health.probe_due() and health.allow_request():
+                    self._probe(health)
+
+    def _probe(self, health: HostHealth):
+        start = time.monotonic()
+        try:
+            # Any answer below 500 means the host is up again
+            response = self.session.get(f"https://{health.host}/", timeout=health.min_timeout)
+            if response.status_code < 500:
+                health.record_success(time.monotonic() - start)
+            else:
+                health.record_failure()
+        except requests.exceptions.RequestException:
+            health.record_failure()
+
+    def snapshot(self) -> List[Dict]:
+        with self.lock:
+            hosts = list(self.hosts.values())
+        return [health.snapshot() for health in hosts]
+
+class DownloadLibrary:
+    """Index of downloaded episodes, kept up to date by polling the download directory"""
+    # ani-cli saves downloads as "<title> Episode <n>.mp4"
+    FILE_PATTERN = re.compile(r'^(?P<title>.+?)\s*Episode\s+(?P<episode>\d+)\.(?:mp4|mkv|ts|webm|m4v)$', re.IGNORECASE)
+    SETTLE_SECONDS = 2  # A file untouched this long isn't being written
+
+    def __init__(self, settings=None, db_path=None):
+        self.settings = settings or Settings()
+        self.db_path = db_path or os.path.join(DATA_DIR, "library.db")
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.dir_mtime = None
+        self.growing = {}  # path -> size at last poll, for files still being written
+        self.thread = None
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.lock, self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    show_key TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    episode INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_files_show_episode ON files (show_key, episode);
+            """)
+
+    def start(self):
+        """Scan once, then keep polling for changes in the background"""
+        self.thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self.thread.start()
+
+    def _poll_loop(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error scanning download library: {e}")
+            time.sleep(self.settings.library_poll_interval)
+
+    def poll(self):
+        """Rescan the download directory if it changed or a download is still growing"""
+        directory = self.settings.download_dir
+        try:
+            dir_mtime = os.stat(directory).st_mtime
+        except OSError:
+            return  # Nothing downloaded yet
+        
+        if dir_mtime == self.dir_mtime and not self.growing:
+            return
+        self.dir_mtime = dir_mtime
+        self.scan(directory)
+
+    def scan(self, directory: str):
+        """Sync the index with the files currently in directory"""
+        found = {}
+        for entry in os.scandir(os.path.normpath(directory)):
+            match = self.FILE_PATTERN.match(entry.name)
+            if not match or not entry.is_file():
+                continue
+            stat = entry.stat()
+            
+            # Files seen growing must also keep their size for a poll; older files are indexed at once
+            recent = time.time() - stat.st_mtime < self.SETTLE_SECONDS
+            if recent or self.growing.get(entry.path, stat.st_size) != stat.st_size:
+                self.growing[entry.path] = stat.st_size
+                continue
+            self.growing.pop(entry.path, None)
+            found[entry.path] = (match.group('title').strip(), int(match.group('episode')), stat.st_size, stat.st_mtime)
+        
+        with self.lock, self.conn:
+            indexed = {path for (path,) in self.conn.execute("SELECT path FROM files")
+                       if os.path.dirname(path) == os.path.normpath(directory)}
+            
+            # Drop files that were deleted; keep ones still being checked
+            removed = indexed - set(found) - set(self.growing)
+            self.conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (path, show_key, title, episode, size, mtime) VALUES (?, ?, ?, ?, ?, ?)",
+                [(path, normalize_title(title), title, episode, size, mtime)
+                 for path, (title, episode, size, mtime) in found.items()]
+            )
+        # Drop entries for files that vanished while growing
+        self.growing = {path: size for path, size in self.growing.items() if os.path.exists(path)}
+
+    def find(self, title: str, episode: int) -> Optional[str]:
+        """Path of a downloaded episode, if it is still on disk"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT path FROM files WHERE show_key = ? AND episode = ?",
+                (normalize_title(title), episode)
+            ).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    def downloaded_mask(self, title: str) -> int:
+        """Bitmask of downloaded episodes for EpisodeAvailability"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT episode FROM files WHERE show_key = ?", (normalize_title(title),)
+            ).fetchall()
+        return EpisodeAvailability.mask_from_numbers(episode for (episode,) in rows)
+
+class ResponseCache:
+    """Thread-safe LRU cache with a per-entry time to live"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float):
+        with self.lock:
+            self.entries[key] = (value, time.time() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+class FixtureMissingError(requests.exceptions.ConnectionError):
+    """Offline mode and the archive has no response for the request"""
+
+class FixtureArchive:
+    """Recorded HTTP responses in a deflate-compressed zip, keyed by method, URL and body"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.staging_dir = path + '.new'  # Responses recorded since the last pack, one file each
+        self.lock = threading.Lock()
+        self.index = {}  # key -> metadata
+        self.staged = set()
+        self.zip = None
+        if os.path.exists(path):
+            try:
+                self.zip = zipfile.ZipFile(path)
+                for name in self.zip.namelist():
+                    if name.endswith('.json'):
+                        self.index[name[:-5]] = json.loads(self.zip.read(name))
+            except (OSError, ValueError, zipfile.BadZipFile) as e:
+                print(f"Error reading fixture archive {path}: {e}")
+                self.zip = None
+        
+        # Responses staged by a session that ended before packing them
+        if os.path.isdir(self.staging_dir):
+            for name in os.listdir(self.staging_dir):
+                if name.endswith('.json'):
+                    try:
+                        with open(os.path.join(self.staging_dir, name), encoding='utf-8') as f:
+                            self.index[name[:-5]] = json.load(f)
+                        self.staged.add(name[:-5])
+                    except (OSError, ValueError):
+                        continue
+            self.pack()
+        atexit.register(self.pack)
+
+    @staticmethod
+    def key(request) -> str:
+        body = request.body or b''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        return hashlib.sha256(f"{request.method} {request.url}\n".encode('utf-8') + body).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get(self, key: str) -> Optional[tuple]:
+        """(metadata, body) for a recorded response"""
+        with self.lock:
+            metadata = self.index.get(key)
+            if metadata is None:
+                return None
+            if key in self.staged:
+                with open(os.path.join(self.staging_dir, f"{key}.body"), 'rb') as f:
+                    return metadata, f.read()
+            if self.zip is None:
+                return None
+            return metadata, self.zip.read(f"{key}.body")
+
+    def add(self, key: str, metadata: Dict, body: bytes):
+        """Stage a response; every file is written whole and renamed into place, body first"""
+        with self.lock:
+            if key in self.index:
+                return
+            os.makedirs(self.staging_dir, exist_ok=True)
+            for name, data in ((f"{key}.body", body), (f"{key}.json", json.dumps(metadata).encode('utf-8'))):
+                path = os.path.join(self.staging_dir, name)
+                with open(path + '.tmp', 'wb') as f:
+                    f.write(data)
+                os.replace(path + '.tmp', path)
+            self.index[key] = metadata
+            self.staged.add(key)
+
+    def pack(self):
+        """Merge staged responses into the zip, replacing it atomically"""
+        with self.lock:
+            if not self.staged:
+                return
+            temp_path = self.path + '.tmp'
+            try:
+                # Merge into the archive as it is on disk now, another instance may have packed since
+                if self.zip:
+                    self.zip.close()
+                    self.zip = None
+                current = zipfile.ZipFile(self.path) if os.path.exists(self.path) else None
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                    names = set(current.namelist()) if current else set()
+                    for name in names:
+                        archive.writestr(name, current.read(name))
+                    for key in self.staged:
+                        for name in (f"{key}.body", f"{key}.json"):
+                            staged_path = os.path.join(self.staging_dir, name)
+                            if name not in names and os.path.exists(staged_path):
+                                archive.write(staged_path, name)
+                if current:
+                    current.close()
+                os.replace(temp_path, self.path)
+                self.zip = zipfile.ZipFile(self.path)
+            except (OSError, zipfile.BadZipFile) as e:
+                print(f"Error packing fixture archive {self.path}: {e}")
+                return  # Staged files stay for the next attempt
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            self.staged.clear()
+
+class FixtureAdapter(HTTPAdapter):
+    """Transport that records responses to a FixtureArchive or replays them from it"""
+    # record saves every response; replay falls back to the network; offline never touches it
+    MODES = ('live', 'record', 'replay', 'offline')
+    # requests has already decoded the body, so these would no longer be true
+    DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+    def __init__(self, archive: FixtureArchive, mode: str = 'replay', latency: float = -1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+        self.mode = mode
+        self.latency = latency
+
+    def send(self, request, **kwargs):
+        key = self.archive.key(request)
+        if self.mode in ('replay', 'offline'):
+            recorded = self.archive.get(key)
+            if recorded:
+                return self._replay(request, *recorded)
+            if self.mode == 'offline':
+                raise FixtureMissingError(f"Offline: no recorded response for {request.method} {request.url}",
+                                          request=request)
+        
+        start = time.monotonic()
+        response = super().send(request, **kwargs)
+        if self.mode == 'record':
+            headers = {name: value for name, value in response.headers.items()
+                       if name.lower() not in self.DROPPED_HEADERS}
+            self.archive.add(key, {
+                'method': request.method, 'url': request.url, 'status': response.status_code,
+                'reason': response.reason, 'headers': headers,
+                'latency': round(time.monotonic() - start, 3)
+            }, response.content)
+        return response
+
+    def _replay(self, request, metadata: Dict, body: bytes):
+        latency = metadata.get('latency', 0.0) if self.latency < 0 else self.latency
+        if latency:
+            time.sleep(latency)
+        
+        response = requests.Response()
+        response.status_code = metadata['status']
+        response.reason = metadata.get('reason')
+        response.headers = CaseInsensitiveDict(metadata.get('headers', {}))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response._content_consumed = True
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
 class AnimeSearchAPI:
-    def __init__(self):
+    def __init__(self, settings=None):
+        self.settings = settings or Settings()
         self.base_url = "https://api.jikan.moe/v4"
         self.anilist_url = "https://graphql.anilist.co"
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'AniCLI-GUI/1.0'
         })
+        self._mount_fixtures()
+        self.health = HealthTracker(self.session, self.settings)
+        self.cache = ResponseCache(self.settings.cache_max_entries)
+        self.episode_count_ttl = self.settings.episode_count_ttl
+        self.anilist_batch_size = 50  # AniList's maximum page size
+        self.search_executor = ThreadPoolExecutor(max_workers=self.settings.search_workers,
+                                                  thread_name_prefix="search")
 
-    def get_anilist_episode_count(self, mal_id: int) -> int:
-        """Get episode count from AniList API using MAL ID"""
+    def _mount_fixtures(self):
+        """Route API traffic through the fixture archive in record, replay and offline modes"""
+        mode = self.settings.http_mode.strip().lower()
+        if mode == 'live':
+            return
+        if mode not in FixtureAdapter.MODES:
+            print(f"Unknown http_mode {mode!r}, using live")
+            return
+        
+        adapter = FixtureAdapter(FixtureArchive(self.settings.fixture_archive), mode,
+                                 self.settings.fixture_latency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        print(f"HTTP {mode} mode with {len(adapter.archive)} recorded responses")
+
+    def _request(self, method: str, url: str, **kwargs):
+        """Send a request through the target host's circuit breaker"""
+        health = self.health.get(urlparse(url).netloc)
+        if not health.allow_request():
+            raise CircuitOpenError(f"{health.host} is unhealthy, skipping request")
+        
+        kwargs.setdefault('timeout', health.timeout())
+        start = time.monotonic()
         try:
-            # GraphQL query to get anime by MAL ID
-            query = """
-            query ($malId: Int) {
-                Media (idMal: $malId, type: ANIME) {
-                    id
-                    episodes
-                    status
-                    nextAiringEpisode {
-                        episode
-                        airingAt
-                    }
-                    title {
-                        romaji
-                        english
-                    }
-                    airingSchedule(page: 1, perPage: 50, notYetAired: false) {
-                        edges {
-                            node {
-                                episode
-                                airingAt
-                            }
-                        }
+            response = self.session.request(method, url, **kwargs)
+        except FixtureMissingError:
+            health.release_trial()  # Not the host's fault, let the next request be the trial
+            raise
+        except requests.exceptions.RequestException:
+            health.record_failure()
+            self._watch_health(health)
+            raise
+        
+        # 4xx (e.g. unknown MAL ID) is the caller's problem, not the host's
+        if response.status_code >= 500 or response.status_code == 429:
+            health.record_failure()
+            self._watch_health(health)
+        else:
+            health.record_success(time.monotonic() - start)
+        return response
+
+    def _watch_health(self, health: HostHealth):
+        if health.state != HostHealth.CLOSED:
+            self.health.ensure_prober()
+
+    def _get(self, url: str, **kwargs):
+        return self._request('GET', url, **kwargs)
+
+    def _post(self, url: str, **kwargs):
+        return self._request('POST', url, **kwargs)
+
+    def get_anilist_media_batch(self, mal_ids: List[int], include_schedule: bool = False,
+                                refresh: bool = False, failed: List[int] = None) -> Dict[int, Dict]:
+        """Get AniList Media objects for many MAL IDs, one request per 50 uncached IDs"""
+        # IDs whose request failed go to `failed`, apart from IDs AniList doesn't know
+        results = {}
+        missing = []
+        for mal_id in dict.fromkeys(mal_ids):  # De-duplicate, keep order
+            cached = None if refresh else self.cache.get(('anilist_media', mal_id))
+            # A cached entry only lacks what the count needs if it is airing without a next episode
+            if cached is not None and (not include_schedule or not self._needs_airing_schedule(cached)):
+                results[mal_id] = cached
+            else:
+                missing.append(mal_id)
+        
+        # Only the fields the episode count logic needs
+        schedule_field = """
+                        airingSchedule(page: 1, perPage: 50, notYetAired: false) {
+                            edges { node { episode airingAt } }
+                        }""" if include_schedule else ""
+        query = """
+            query ($ids: [Int], $perPage: Int) {
+                Page (page: 1, perPage: $perPage) {
+                    media (idMal_in: $ids, type: ANIME) {
+                        idMal
+                        episodes
+                        status
+                        title { romaji english }
+                        nextAiringEpisode { episode airingAt }%s
                     }
                 }
             }
-            """
-            
-            variables = {'malId': mal_id}
-            
-            response = self.session.post(
-                self.anilist_url,
-                json={'query': query, 'variables': variables},
-                timeout=10
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            media = data.get('data', {}).get('Media')
-            
-            if not media:
-                return 0
-            
-            episodes = media.get('episodes')
-            next_airing = media.get('nextAiringEpisode')
-            status = media.get('status')
-            title = media.get('title', {}).get('romaji', 'Unknown')
-            airing_schedule = media.get('airingSchedule', {}).get('edges', [])
-            
-            print(f"AniList data - Title: {title}, Status: {status}, Total Episodes: {episodes}")
-            
-            # For currently airing anime, determine actual available episodes
-            if status in ['RELEASING', 'AIRING']:
-                # Method 1: Use nextAiringEpisode (most reliable)
-                if next_airing and next_airing.get('episode'):
-                    current_episode = next_airing.get('episode') - 1
-                    print(f"Next airing episode: {next_airing.get('episode')}, so current available: {current_episode}")
-                    return max(0, current_episode)
+            """ % schedule_field
+        
+        for start in range(0, len(missing), self.anilist_batch_size):
+            chunk = missing[start:start + self.anilist_batch_size]
+            try:
+                response = self._post(
+                    self.anilist_url,
+                    json={'query': query, 'variables': {'ids': chunk, 'perPage': len(chunk)}}
+                )
+                response.raise_for_status()
                 
-                # Method 2: Count aired episodes from schedule
-                elif airing_schedule:
-                    import time
-                    current_time = int(time.time())
-                    aired_episodes = 0
-                    
-                    for edge in airing_schedule:
-                        node = edge.get('node', {})
-                        airing_at = node.get('airingAt', 0)
-                        if airing_at <= current_time:  # Episode has already aired
-                            aired_episodes = max(aired_episodes, node.get('episode', 0))
+                page = (response.json().get('data') or {}).get('Page') or {}
+                for media in page.get('media') or []:
+                    mal_id = media.get('idMal')
+                    if not mal_id:
+                        continue
+                    results[mal_id] = media
+                    self._cache_anilist_media(mal_id, media)
                     
-                    if aired_episodes > 0:
-                        print(f"From airing schedule: {aired_episodes} episodes have aired")
-                        return aired_episodes
-                
-                # Method 3: Conservative estimate for new airing anime
-                print("Using conservative estimate for new airing anime")
-                return 6  # Conservative default
+            except Exception as e:
+                print(f"Error fetching batch from AniList: {e}")
+                if failed is not None:
+                    failed.extend(chunk)
+        
+        return results
+
+    def _cache_anilist_media(self, mal_id: int, media: Dict):
+        """Cache a Media object until its next episode airs"""
+        next_airing = media.get('nextAiringEpisode') or {}
+        if next_airing.get('airingAt'):
+            ttl = max(60, next_airing['airingAt'] - time.time())
+        else:
+            ttl = self.episode_count_ttl
+        self.cache.set(('anilist_media', mal_id), media, ttl)
+
+    def get_anilist_episode_count(self, mal_id: int) -> int:
+        """Get episode count from AniList API using MAL ID"""
+        media = self.get_anilist_media_batch([mal_id], include_schedule=True).get(mal_id)
+        if not media:
+            return 0
+        
+        return self._episode_count_from_anilist_media(media)
+
+    @staticmethod
+    def _needs_airing_schedule(media: Dict) -> bool:
+        """Whether counting aired episodes needs airingSchedule (no nextAiringEpisode to go by)"""
+        return (media.get('status') in ['RELEASING', 'AIRING']
+                and not (media.get('nextAiringEpisode') or {}).get('episode')
+                and media.get('airingSchedule') is None)
+
+    def _episode_count_from_anilist_media(self, media: Dict) -> int:
+        """Work out how many episodes are out from an AniList Media object"""
+        episodes = media.get('episodes')
+        next_airing = media.get('nextAiringEpisode')
+        status = media.get('status')
+        title = (media.get('title') or {}).get('romaji', 'Unknown')
+        airing_schedule = (media.get('airingSchedule') or {}).get('edges', [])
+        
+        print(f"AniList data - Title: {title}, Status: {status}, Total Episodes: {episodes}")
+        
+        # For currently airing anime, determine actual available episodes
+        if status in ['RELEASING', 'AIRING']:
+            # Method 1: Use nextAiringEpisode (most reliable)
+            if next_airing and next_airing.get('episode'):
+                current_episode = next_airing.get('episode') - 1
+                print(f"Next airing episode: {next_airing.get('episode')}, so current available: {current_episode}")
+                return max(0, current_episode)
             
-            # For completed anime, return total episodes
-            elif episodes:
-                print(f"Completed anime with {episodes} total episodes")
-                return episodes
-            else:
-                return 0
+            # Method 2: Count aired episodes from schedule
+            elif airing_schedule:
+                current_time = int(time.time())
+                aired_episodes = 0
                 
-        except Exception as e:
-            print(f"Error fetching from AniList: {e}")
+                for edge in airing_schedule:
+                    node = edge.get('node', {})
+                    airing_at = node.get('airingAt', 0)
+                    if airing_at <= current_time:  # Episode has already aired
+                        aired_episodes = max(aired_episodes, node.get('episode', 0))
+                
+                if aired_episodes > 0:
+                    print(f"From airing schedule: {aired_episodes} episodes have aired")
+                    return aired_episodes
+            
+            # Method 3: Conservative estimate for new airing anime
+            print("Using conservative estimate for new airing anime")
+            return 6  # Conservative default
+        
+        # For completed anime, return total episodes
+        elif episodes:
+            print(f"Completed anime with {episodes} total episodes")
+            return episodes
+        else:
             return 0
 
     def get_kitsu_episode_count(self, title: str) -> int:
@@ -122,7 +1105,7 @@ class AnimeSearchAPI:
                 'page[limit]': 1
             }
             
-            response = self.session.get(url, params=params, timeout=10)
+            response = self._get(url, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -153,7 +1136,7 @@ class AnimeSearchAPI:
                 'type': 'tv'
             }
             
-            response = self.session.get(url, params=params, timeout=10)
+            response = self._get(url, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -179,57 +1162,240 @@ class AnimeSearchAPI:
             print(f"Error parsing API response: {e}")
             return []
 
-    def get_episodes_from_malsync(self, mal_id: int) -> List[Dict]:
-        """Get episode details from MAL-Sync API"""
+    def get_anime_details(self, mal_id: int) -> Dict:
+        """Get Jikan's anime record for a MAL ID, served from cache when fresh"""
+        cached = self.cache.get(('jikan_anime', mal_id))
+        if cached is not None:
+            return cached
+        
         try:
-            # MAL-Sync API endpoint
-            url = f"https://api.malsync.moe/mal/anime/{mal_id}"
-            response = self.session.get(url, timeout=10)
+            url = f"{self.base_url}/anime/{mal_id}"
+            response = self._get(url)
+            response.raise_for_status()
+            
+            anime_data = response.json().get('data', {})
+            self.cache.set(('jikan_anime', mal_id), anime_data, self.episode_count_ttl)
+            return anime_data
+            
+        except Exception as e:
+            print(f"Error getting anime info: {e}")
+            return {}
+
+    def get_cached_episode_data(self, mal_id: int):
+        """Return (episode count, availability mask) if both are cached, else None"""
+        count = self.cache.get(('episode_count', mal_id))
+        mask = self.cache.get(('malsync_mask', mal_id))
+        if count is None or mask is None:
+            return None
+        return count, mask
+
+    def prefetch_episode_data(self, mal_id: int):
+        """Resolve everything EpisodeWindow needs so it can open populated"""
+        self.get_actual_episode_count(mal_id)
+        self.get_available_episode_mask(mal_id)
+
+    def search_anime_anilist(self, query: str, limit: int = 10) -> List[Dict]:
+        """Search for anime using AniList GraphQL API"""
+        try:
+            graphql = """
+            query ($search: String, $perPage: Int) {
+                Page (page: 1, perPage: $perPage) {
+                    media (search: $search, type: ANIME, format: TV) {
+                        idMal
+                        title { romaji english }
+                        episodes
+                        averageScore
+                        seasonYear
+                        coverImage { medium }
+                    }
+                }
+            }
+            """
+            response = self._post(
+                self.anilist_url,
+                json={'query': graphql, 'variables': {'search': query, 'perPage': limit}}
+            )
+            response.raise_for_status()
+            
+            page = (response.json().get('data') or {}).get('Page') or {}
+            anime_list = []
+            
+            for media in page.get('media') or []:
+                title = media.get('title') or {}
+                score = media.get('averageScore')
+                anime_info = {
+                    'title': title.get('romaji') or title.get('english') or 'Unknown',
+                    'episodes': media.get('episodes') or 0,
+                    'score': score / 10 if score else 0,
+                    'year': media.get('seasonYear'),
+                    'image_url': (media.get('coverImage') or {}).get('medium'),
+                    'mal_id': media.get('idMal')
+                }
+                anime_list.append(anime_info)
+            
+            return anime_list
+            
+        except Exception as e:
+            print(f"AniList search failed: {e}")
+            return []
+
+    def search_anime_kitsu(self, query: str, limit: int = 10) -> List[Dict]:
+        """Search for anime using Kitsu API, mapped back to MAL IDs where possible"""
+        try:
+            url = "https://kitsu.io/api/edge/anime"
+            params = {
+                'filter[text]': query,
+                'filter[subtype]': 'TV',
+                'page[limit]': limit,
+                'include': 'mappings'
+            }
+            
+            response = self._get(url, params=params)
             response.raise_for_status()
             
             data = response.json()
-            episodes = []
             
-            # Extract episodes from the response
-            if 'Sites' in data:
-                # Look for available episodes from streaming sites
-                available_episodes = set()
+            # MAL IDs live in the included mapping records
+            mal_ids = {}
+            for included in data.get('included', []):
+                attributes = included.get('attributes', {})
+                if included.get('type') == 'mappings' and attributes.get('externalSite') == 'myanimelist/anime':
+                    mal_ids[included.get('id')] = attributes.get('externalId')
+            
+            anime_list = []
+            for anime in data.get('data', []):
+                attributes = anime.get('attributes', {})
+                mappings = ((anime.get('relationships') or {}).get('mappings') or {}).get('data') or []
+                mal_id = next((mal_ids[m['id']] for m in mappings if m.get('id') in mal_ids), None)
+                start_date = attributes.get('startDate') or ''
+                score = attributes.get('averageRating')
+                
+                anime_info = {
+                    'title': attributes.get('canonicalTitle', 'Unknown'),
+                    'episodes': attributes.get('episodeCount') or 0,
+                    'score': round(float(score) / 10, 2) if score else 0,
+                    'year': int(start_date[:4]) if start_date[:4].isdigit() else None,
+                    'image_url': (attributes.get('posterImage') or {}).get('small'),
+                    'mal_id': int(mal_id) if mal_id and str(mal_id).isdigit() else None
+                }
+                anime_list.append(anime_info)
+            
+            return anime_list
+            
+        except Exception as e:
+            print(f"Kitsu search failed: {e}")
+            return []
+
+    def search_anime(self, query: str, limit: int = None, deadline: float = None) -> List[Dict]:
+        """Search Jikan, AniList and Kitsu in parallel and merge the results"""
+        limit = limit or self.settings.search_limit
+        deadline = self.settings.search_deadline if deadline is None else deadline
+        providers = [
+            ('jikan', self.search_anime_jikan),
+            ('anilist', self.search_anime_anilist),
+            ('kitsu', self.search_anime_kitsu)
+        ]
+        futures = {self.search_executor.submit(search, query, limit): name for name, search in providers}
+        
+        # Take everything that finishes within the deadline
+        done, pending = wait(futures, timeout=deadline)
+        results = {futures[future]: future.result() for future in done}
+        
+        # Nothing usable yet: settle for the first provider that returns results
+        while pending and not any(results.values()):
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            results.update({futures[future]: future.result() for future in done})
+        
+        if pending:
+            print(f"Search deadline reached, skipping: {', '.join(futures[future] for future in pending)}")
+        
+        ordered = [results.get(name, []) for name, _ in providers]
+        return self._merge_search_results(ordered)[:limit]
+
+    def _merge_search_results(self, result_lists: List[List[Dict]]) -> List[Dict]:
+        """Merge provider results by MAL ID or title, earlier lists taking precedence"""
+        merged = []
+        by_key = {}
+        
+        # Interleave so each provider's best matches stay near the top
+        for rank_group in itertools.zip_longest(*result_lists):
+            for anime in rank_group:
+                if not anime:
+                    continue
+                mal_id = anime.get('mal_id')
+                title_key = ('title', normalize_title(anime.get('title')))
                 
-                for site, site_data in data['Sites'].items():
-                    if isinstance(site_data, dict) and 'episodes' in site_data:
-                        # Only count episodes that have actual URLs (meaning they're available)
-                        for ep_num, ep_data in site_data['episodes'].items():
-                            if ep_data.get('url'):  # Only include episodes with actual streaming URLs
-                                available_episodes.add(int(ep_num))
+                existing = by_key.get(('mal', mal_id)) if mal_id else None
+                if existing is None and title_key in by_key:
+                    # Same title but a different MAL ID is a different show (e.g. remakes)
+                    candidate = by_key[title_key]
+                    if not mal_id or not candidate.get('mal_id'):
+                        existing = candidate
                 
-                # Create episode list only for available episodes
-                for ep_num in sorted(available_episodes):
-                    episode_info = {
-                        'number': ep_num,
-                        'title': f'Episode {ep_num}',
-                        'url': '',
-                        'site': 'malsync'
-                    }
-                    episodes.append(episode_info)
+                if existing is None:
+                    existing = dict(anime)
+                    merged.append(existing)
+                else:
+                    # Fill in whatever the earlier provider was missing
+                    for field, value in anime.items():
+                        if value and not existing.get(field):
+                            existing[field] = value
+                
+                by_key.setdefault(title_key, existing)
+                if existing.get('mal_id'):
+                    by_key.setdefault(('mal', existing['mal_id']), existing)
+        
+        return merged
+
+    def get_available_episode_mask(self, mal_id: int) -> int:
+        """Get a bitmask of episodes that MAL-Sync lists with a streaming URL"""
+        cached = self.cache.get(('malsync_mask', mal_id))
+        if cached is not None:
+            return cached
+        
+        try:
+            # MAL-Sync API endpoint
+            url = f"https://api.malsync.moe/mal/anime/{mal_id}"
+            response = self._get(url)
+            response.raise_for_status()
             
-            # Sort episodes by number
-            episodes.sort(key=lambda x: x['number'])
-            return episodes
+            data = response.json()
+            available_mask = 0
+            
+            # Look for available episodes from streaming sites
+            for site, site_data in data.get('Sites', {}).items():
+                if isinstance(site_data, dict) and 'episodes' in site_data:
+                    # Only count episodes that have actual URLs (meaning they're available)
+                    for ep_num, ep_data in site_data['episodes'].items():
+                        if ep_data.get('url'):
+                            number = int(ep_num)
+                            if number >= 1:
+                                available_mask |= 1 << (number - 1)
+            
+            self.cache.set(('malsync_mask', mal_id), available_mask, self.episode_count_ttl)
+            return available_mask
             
         except Exception as e:
             print(f"Error fetching episodes from MAL-Sync: {e}")
-            return []
+            return 0
 
     def get_actual_episode_count(self, mal_id: int) -> int:
+        """Get the actual number of released episodes, served from cache when fresh"""
+        cached = self.cache.get(('episode_count', mal_id))
+        if cached is not None:
+            print(f"Episode count for MAL ID {mal_id} from cache: {cached}")
+            return cached
+        
+        count = self._resolve_actual_episode_count(mal_id)
+        if count > 0:
+            self.cache.set(('episode_count', mal_id), count, self.episode_count_ttl)
+        return count
+
+    def _resolve_actual_episode_count(self, mal_id: int) -> int:
         """Get the actual number of released episodes using multiple APIs for accuracy"""
         try:
             # Use Jikan API to get basic episode information
-            url = f"https://api.jikan.moe/v4/anime/{mal_id}"
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            anime_data = data.get('data', {})
+            anime_data = self.get_anime_details(mal_id)
             
             status = anime_data.get('status', '')
             aired_episodes = anime_data.get('episodes')
@@ -293,7 +1459,7 @@ class AnimeSearchAPI:
             if mal_id == 21:  # One Piece MAL ID
                 # Get the main anime data and check broadcast info
                 url = f"https://api.jikan.moe/v4/anime/{mal_id}"
-                response = self.session.get(url, timeout=10)
+                response = self._get(url)
                 response.raise_for_status()
                 
                 data = response.json()
@@ -303,13 +1469,22 @@ class AnimeSearchAPI:
                 # This should be updated based on current releases
                 return 1100  # Current approximate episode count (as of 2024)
             
-            # For other anime, try to get all episodes with pagination
+            # For other anime, count the paginated episode list
+            return len(self.get_jikan_episodes(mal_id, max_pages=10))
+            
+        except Exception as e:
+            print(f"Error getting current episode count: {e}")
+            return 0
+
+    def get_jikan_episodes(self, mal_id: int, max_pages: int = 20) -> List[Dict]:
+        """Get Jikan's episode list (number, title, air date, filler flag), 100 episodes per page"""
+        try:
             all_episodes = []
             page = 1
             
-            while page <= 10:  # Limit to 10 pages to prevent infinite loops
-                url = f"https://api.jikan.moe/v4/anime/{mal_id}/episodes?page={page}"
-                response = self.session.get(url, timeout=10)
+            while page <= max_pages:  # Limit pages to prevent infinite loops
+                url = f"{self.base_url}/anime/{mal_id}/episodes?page={page}"
+                response = self._get(url)
                 response.raise_for_status()
                 
                 data = response.json()
@@ -326,19 +1501,21 @@ class AnimeSearchAPI:
                     break
                     
                 page += 1
+                time.sleep(0.4)  # Jikan allows about 3 requests per second
             
-            return len(all_episodes) if all_episodes else 0
+            return all_episodes
             
         except Exception as e:
-            print(f"Error getting current episode count: {e}")
-            return 0
+            print(f"Error getting Jikan episodes: {e}")
+            return []
 
-    def load_image_from_url(self, url: str, size: tuple = (80, 120)):
+    def load_image_from_url(self, url: str, size: tuple = None):
         """Load image from URL and return PIL Image"""
         try:
             if not url:
                 return None
-            response = self.session.get(url, timeout=10)
+            size = size or (self.settings.image_width, self.settings.image_height)
+            response = self._get(url)
             response.raise_for_status()
             
             from io import BytesIO
@@ -349,12 +1526,342 @@ class AnimeSearchAPI:
             print(f"Error loading image: {e}")
             return None
 
+class PrefetchQueue:
+    """Low-priority background resolution of episode data for likely next clicks"""
+    SELECTED = 0
+    HOVER = 1
+    WARM = 2
+
+    def __init__(self, api, max_jobs_per_minute: int = 12):
+        self.api = api
+        self.max_jobs_per_minute = max_jobs_per_minute
+        self.jobs = queue.PriorityQueue()
+        self.pending = {}  # mal_id -> best queued priority
+        self.recent_jobs = []  # Start times of jobs inside the budget window
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def request(self, mal_id: int, priority: int = WARM):
+        """Queue a show for prefetching, raising its priority if already queued"""
+        if not mal_id or self.api.get_cached_episode_data(mal_id):
+            return
+        with self.lock:
+            if mal_id in self.pending and self.pending[mal_id] <= priority:
+                return
+            self.pending[mal_id] = priority
+        self.jobs.put((priority, next(self.counter), mal_id))
+
+    def _wait_for_budget(self):
+        """Sleep until another job fits in the per-minute request budget"""
+        while True:
+            now = time.time()
+            self.recent_jobs = [started for started in self.recent_jobs if now - started < 60]
+            if len(self.recent_jobs) < self.max_jobs_per_minute:
+                self.recent_jobs.append(now)
+                return
+            time.sleep(60 - (now - self.recent_jobs[0]))
+
+    def _run(self):
+        while True:
+            priority, _, mal_id = self.jobs.get()
+            with self.lock:
+                # Skip entries superseded by a higher-priority request
+                if self.pending.get(mal_id) != priority:
+                    continue
+            
+            if not self.api.get_cached_episode_data(mal_id):
+                self._wait_for_budget()
+                try:
+                    self.api.prefetch_episode_data(mal_id)
+                except Exception as e:
+                    print(f"Error prefetching MAL ID {mal_id}: {e}")
+            
+            with self.lock:
+                self.pending.pop(mal_id, None)
+
+class AiringScheduler:
+    """Refreshes episode counts of followed airing shows around their air times"""
+
+    def __init__(self, api, history, on_new_episode=None):
+        self.api = api
+        self.history = history
+        self.on_new_episode = on_new_episode
+        self.followed = set()
+        self.next_airing = {}  # mal_id -> airingAt (unix time)
+        self.known_counts = {}
+        self.lock = threading.Lock()
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        
+        self.max_sleep = 6 * 60 * 60  # Re-check the watch list at least this often
+        self.failures = 0  # Consecutive failed refreshes
+        self.retry_at = 0.0  # Backoff after a failed refresh (unix time)
+        self.grace_period = api.settings.airing_grace_period  # Providers lag a little behind the broadcast
+
+    def start(self):
+        """Start the scheduler thread, following recently watched shows"""
+        for anime in self.history.recently_watched(limit=50):
+            self.followed.add(anime['mal_id'])
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+
+    def follow(self, mal_id: int):
+        """Start tracking a show and refresh it on the next wake-up"""
+        with self.lock:
+            if mal_id in self.followed:
+                return
+            self.followed.add(mal_id)
+        self.wake_event.set()
+
+    def _due_shows(self) -> List[int]:
+        """Shows with no known schedule yet, or whose next episode should be out"""
+        now = time.time()
+        if now < self.retry_at:
+            return []
+        with self.lock:
+            return [
+                mal_id for mal_id in self.followed
+                if mal_id not in self.next_airing
+                or self.next_airing[mal_id] + self.grace_period <= now
+            ]
+
+    def _seconds_until_next_wake(self) -> float:
+        with self.lock:
+            upcoming = [airing_at + self.grace_period for airing_at in self.next_airing.values()]
+        if self.retry_at:
+            upcoming.append(self.retry_at)
+        if not upcoming:
+            return self.max_sleep
+        return max(1, min(min(upcoming) - time.time(), self.max_sleep))
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            due = self._due_shows()
+            if due:
+                self.refresh(due)
+            
+            self.wake_event.wait(self._seconds_until_next_wake())
+            self.wake_event.clear()
+
+    def refresh(self, mal_ids: List[int]):
+        """Refresh followed shows with batched AniList requests"""
+        failed = []
+        media_by_id = self.api.get_anilist_media_batch(mal_ids, refresh=True, failed=failed)
+        now = time.time()
+        
+        if failed:
+            # Network down or AniList unhealthy: keep the shows and retry with backoff
+            self.failures += 1
+            self.retry_at = now + min(60 * 2 ** (self.failures - 1), self.max_sleep)
+        else:
+            self.failures = 0
+            self.retry_at = 0.0
+        
+        for mal_id in mal_ids:
+            if mal_id in failed:
+                continue
+            media = media_by_id.get(mal_id)
+            if not media:
+                # Unknown to AniList, stop asking about it
+                with self.lock:
+                    self.followed.discard(mal_id)
+                continue
+            
+            next_airing = media.get('nextAiringEpisode') or {}
+            airing_at = next_airing.get('airingAt')
+            with self.lock:
+                if airing_at:
+                    self.next_airing[mal_id] = airing_at
+                else:
+                    # Finished or on hiatus: nothing to wake up for
+                    self.next_airing.pop(mal_id, None)
+                    self.followed.discard(mal_id)
+            
+            if self.api._needs_airing_schedule(media):
+                # Airing without a next episode, the count would only be a guess; leave it
+                # to get_actual_episode_count, which fetches the schedule and other sources
+                continue
+            
+            count = self.api._episode_count_from_anilist_media(media)
+            with self.lock:
+                previous = self.known_counts.get(mal_id)
+                self.known_counts[mal_id] = count
+            
+            if count > 0:
+                # Keep the count until the next episode is due
+                ttl = airing_at + self.grace_period - now if airing_at else self.api.episode_count_ttl
+                self.api.cache.set(('episode_count', mal_id), count, max(60, ttl))
+            
+            if previous is not None and count > previous and self.on_new_episode:
+                title = (media.get('title') or {}).get('romaji', 'Unknown')
+                self.on_new_episode(mal_id, title, count)
+
+class ArcIndex:
+    """Named episode ranges (arcs, seasons) of one show, looked up by bisecting their start episodes"""
+    SEASON_GAP = 28 * 24 * 60 * 60  # An air date gap this long starts a new season
+    MIN_ARC_LENGTH = 3  # Shortest run of "Arc: episode title" names treated as an arc
+    BLOCK_SIZE = 100  # Arcs longer than two blocks are split for navigation
+    
+    # Hand-made arc tables for shows whose episode titles don't name their arcs, keyed by MAL ID
+    SEEDS = {
+        21: [  # One Piece
+            ("East Blue", 1, 61),
+            ("Alabasta", 62, 135),
+            ("Skypeia", 136, 206),
+            ("Water 7", 207, 325),
+            ("Thriller Bark", 326, 384),
+            ("Summit War", 385, 516),
+            ("Fishman Island", 517, 574),
+            ("Dressrosa", 575, 746),
+            ("Whole Cake Island", 747, 877),
+            ("Wano", 878, 1085),
+            ("Recent", 1086, None)
+        ]
+    }
+
+    def __init__(self, arcs: List[tuple], total_episodes: int = 0, built_at: float = None):
+        # (name, start, end) sorted by start; end None means open-ended (the airing arc)
+        self.arcs = sorted(arcs, key=lambda arc: arc[1])
+        self.starts = [arc[1] for arc in self.arcs]
+        self.total_episodes = total_episodes
+        self.built_at = built_at or time.time()
+
+    def arc_for(self, episode: int) -> Optional[tuple]:
+        """The arc containing an episode, or None if it falls between arcs"""
+        index = bisect.bisect_right(self.starts, episode) - 1
+        if index < 0:
+            return None
+        name, start, end = self.arcs[index]
+        if end is not None and episode > end:
+            return None
+        return self.arcs[index]
+
+    def shortcuts(self, total_episodes: int) -> List[tuple]:
+        """Arcs that have started, with open ends closed at the latest episode"""
+        return [(name, start, min(end or total_episodes, total_episodes))
+                for name, start, end in self.arcs if start <= total_episodes]
+
+    @classmethod
+    def from_episodes(cls, episodes: List[Dict]) -> 'ArcIndex':
+        """Build an index from Jikan episodes: seasons split at air date gaps, arcs from shared title prefixes"""
+        episodes = sorted((episode for episode in episodes if episode.get('mal_id')), key=lambda e: e['mal_id'])
+        if not episodes:
+            return cls([])
+        
+        # Seasons: consecutive episodes without a long break in air dates
+        seasons = [[episodes[0]]]
+        for previous, episode in zip(episodes, episodes[1:]):
+            previous_aired, aired = cls._aired(previous), cls._aired(episode)
+            if previous_aired and aired and aired - previous_aired > cls.SEASON_GAP:
+                seasons.append([])
+            seasons[-1].append(episode)
+        
+        arcs = []
+        for season_number, season in enumerate(seasons, 1):
+            season_name = f"Season {season_number}" if len(seasons) > 1 else "Episodes"
+            arcs += cls._title_arcs(season, season_name)
+        
+        # Keep huge unnamed stretches navigable
+        split_arcs = []
+        for name, start, end in arcs:
+            if end - start + 1 > 2 * cls.BLOCK_SIZE:
+                for block_start in range(start, end + 1, cls.BLOCK_SIZE):
+                    block_end = min(block_start + cls.BLOCK_SIZE - 1, end)
+                    split_arcs.append((f"{name} {block_start}-{block_end}", block_start, block_end))
+            else:
+                split_arcs.append((name, start, end))
+        
+        # The last arc stays open so new episodes of an airing show land in it
+        name, start, _ = split_arcs[-1]
+        split_arcs[-1] = (name, start, None)
+        return cls(split_arcs, episodes[-1]['mal_id'])
+
+    @classmethod
+    def _title_arcs(cls, season: List[Dict], season_name: str) -> List[tuple]:
+        """Split a season into runs of episodes titled "<arc>: <episode title>" """
+        runs = []  # [prefix, start, end]
+        for episode in season:
+            title = episode.get('title') or ''
+            prefix = title.split(':', 1)[0].strip() if ':' in title else None
+            if runs and runs[-1][0] == prefix:
+                runs[-1][2] = episode['mal_id']
+            else:
+                runs.append([prefix, episode['mal_id'], episode['mal_id']])
+        
+        arcs = []
+        for prefix, start, end in runs:
+            is_arc = prefix and end - start + 1 >= cls.MIN_ARC_LENGTH
+            name = prefix if is_arc else season_name
+            if arcs and not is_arc and arcs[-1][0] == name:
+                arcs[-1] = (name, arcs[-1][1], end)  # Merge unnamed stretches
+            else:
+                arcs.append((name, start, end))
+        return arcs
+
+    @staticmethod
+    def _aired(episode: Dict) -> Optional[float]:
+        try:
+            return datetime.fromisoformat(episode['aired']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def path(mal_id: int) -> str:
+        return os.path.join(DATA_DIR, "arcs", f"{mal_id}.json")
+
+    @classmethod
+    def load(cls, mal_id: int) -> Optional['ArcIndex']:
+        try:
+            with open(cls.path(mal_id), encoding='utf-8') as f:
+                data = json.load(f)
+            return cls([tuple(arc) for arc in data['arcs']], data['total_episodes'], data['built_at'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, mal_id: int):
+        os.makedirs(os.path.dirname(self.path(mal_id)), exist_ok=True)
+        with open(self.path(mal_id), 'w', encoding='utf-8') as f:
+            json.dump({'arcs': self.arcs, 'total_episodes': self.total_episodes,
+                       'built_at': self.built_at}, f)
+
+    @classmethod
+    def for_show(cls, api, mal_id: int, total_episodes: int) -> Optional['ArcIndex']:
+        """Seeded or disk-cached index, rebuilt from Jikan once new episodes have aired"""
+        if mal_id in cls.SEEDS:
+            return cls(cls.SEEDS[mal_id], total_episodes)
+        
+        cached = cls.load(mal_id)
+        if cached and (cached.total_episodes >= total_episodes
+                       or time.time() - cached.built_at < api.episode_count_ttl):
+            return cached
+        
+        episodes = api.get_jikan_episodes(mal_id)
+        if not episodes:
+            return cached
+        index = cls.from_episodes(episodes)
+        try:
+            index.save(mal_id)
+        except OSError as e:
+            print(f"Error saving arc index: {e}")
+        return index
+
 class EpisodeWindow:
     def __init__(self, parent, anime_data, api):
         self.parent = parent
         self.anime_data = anime_data
         self.api = api
         self.selected_episode = None
+        self.availability = EpisodeAvailability()
+        self.episode_frames = {}
+        self.shown_range = None
+        self.arc_index = None
         
         # Create new window
         self.window = ctk.CTkToplevel(parent.root)
@@ -394,6 +1901,9 @@ class EpisodeWindow:
         play_button = ctk.CTkButton(buttons_frame, text="Play Episode", command=self.play_selected_episode)
         play_button.pack(side="left", padx=5, pady=10)
         
+        play_range_button = ctk.CTkButton(buttons_frame, text="Play Range", command=self.play_shown_range)
+        play_range_button.pack(side="left", padx=5, pady=10)
+        
         close_button = ctk.CTkButton(buttons_frame, text="Close", command=self.window.destroy)
         close_button.pack(side="right", padx=5, pady=10)
     
@@ -406,6 +1916,12 @@ class EpisodeWindow:
             self.create_basic_episode_list(total_episodes)
             return
         
+        # Prefetched data lets the window open already populated
+        cached = self.api.get_cached_episode_data(mal_id)
+        if cached:
+            self.create_basic_episode_list(*cached)
+            return
+        
         # Load episodes in background thread
         threading.Thread(target=self._load_episodes_thread, args=(mal_id,), daemon=True).start()
     
@@ -413,54 +1929,80 @@ class EpisodeWindow:
         """Load episodes in separate thread"""
         print(f"\n=== Loading episodes for MAL ID: {mal_id} ===")
         
-        # Get basic anime info first
-        try:
-            url = f"https://api.jikan.moe/v4/anime/{mal_id}"
-            response = self.api.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            anime_data = data.get('data', {})
-            title = anime_data.get('title', 'Unknown')
-            status = anime_data.get('status', 'Unknown')
-            total_planned = anime_data.get('episodes')
-            
-            print(f"Anime: {title}")
-            print(f"Status: {status}")
-            print(f"Planned Episodes: {total_planned}")
-        except Exception as e:
-            print(f"Error getting anime info: {e}")
-            title = "Unknown"
-            status = "Unknown"
+        # Get basic anime info first (shared with the episode count lookup)
+        anime_data = self.api.get_anime_details(mal_id)
+        print(f"Anime: {anime_data.get('title', 'Unknown')}")
+        print(f"Status: {anime_data.get('status', 'Unknown')}")
+        print(f"Planned Episodes: {anime_data.get('episodes')}")
         
         # Get actual episode count using our improved multi-API method
         actual_episode_count = self.api.get_actual_episode_count(mal_id)
         print(f"=== Final episode count determined: {actual_episode_count} ===\n")
         
-        # Try to get episode details from MAL-Sync for titles (optional)
-        episodes_from_malsync = self.api.get_episodes_from_malsync(mal_id)
-        print(f"Episodes from MAL-Sync: {len(episodes_from_malsync) if episodes_from_malsync else 0}")
+        # Availability on streaming sites from MAL-Sync (optional)
+        available_mask = self.api.get_available_episode_mask(mal_id)
+        print(f"Episodes from MAL-Sync: {bin(available_mask).count('1')}")
         
         # Use the episode count to create pagination, not a full episode list
         if actual_episode_count > 0:
-            self.window.after(0, lambda: self.create_basic_episode_list(actual_episode_count))
+            self.window.after(0, lambda: self.create_basic_episode_list(actual_episode_count, available_mask))
         else:
             # Fallback to default
             print("Using fallback episode count")
-            self.window.after(0, lambda: self.create_basic_episode_list(12))
+            self.window.after(0, lambda: self.create_basic_episode_list(12, available_mask))
 
-    def create_basic_episode_list(self, total_episodes):
+    def create_basic_episode_list(self, total_episodes, available_mask=0):
         """Create basic episode list when MAL-Sync data is not available"""
         if total_episodes == 0 or total_episodes is None:
             total_episodes = 12  # Default
         
+        # Episode state lives in bitsets; rows are only built for the visible page
+        self.availability = EpisodeAvailability(
+            total_episodes, available_mask,
+            self.parent.library.downloaded_mask(self.anime_data.get('title', ''))
+        )
+        
         # Always use pagination for better performance
-        self.total_episodes = total_episodes
-        self.episodes_per_page = 25  # Smaller pages for better performance
+        self.total_episodes = self.availability.total_episodes
+        self.episodes_per_page = self.parent.settings.episodes_per_page
         self.current_page = 1
         
+        # Open on the page holding the next unwatched episode
+        next_episode = None
+        mal_id = self.anime_data.get('mal_id')
+        if mal_id:
+            next_episode = self.parent.history.next_unwatched_episode(mal_id)
+        if next_episode and self.availability.is_released(next_episode):
+            self.current_page = (next_episode - 1) // self.episodes_per_page + 1
+        
         self.setup_pagination_controls()
         self.load_current_page()
+        
+        if next_episode and next_episode in self.episode_frames:
+            self.select_episode(self.episode_frames[next_episode], EpisodeView(next_episode))
+        
+        # Arc/season shortcuts for shows longer than one page
+        if mal_id and self.total_episodes > self.episodes_per_page:
+            threading.Thread(target=self._load_arc_index_thread, args=(mal_id,), daemon=True).start()
+    
+    def _load_arc_index_thread(self, mal_id):
+        """Build or load the arc index in the background"""
+        arc_index = ArcIndex.for_show(self.api, mal_id, self.total_episodes)
+        if arc_index and len(arc_index.shortcuts(self.total_episodes)) > 1:
+            # Posted via the main window: this one may have been closed while the index was built
+            self.parent.root.after(0, lambda: self.show_arc_index(arc_index))
+    
+    def show_arc_index(self, arc_index):
+        """Add arc shortcuts once the index is ready"""
+        try:
+            if not self.window.winfo_exists():
+                return
+        except TclError:
+            return
+        self.arc_index = arc_index
+        self.add_arc_shortcuts(self.nav_frame)
+        if self.shown_range:
+            self.range_label.configure(text=self._range_text(*self.shown_range))
     
     def setup_pagination_controls(self):
         """Setup pagination navigation controls"""
@@ -472,6 +2014,7 @@ class EpisodeWindow:
         # Create navigation frame
         nav_frame = ctk.CTkFrame(self.range_frame)
         nav_frame.pack(fill="x", padx=10, pady=5)
+        self.nav_frame = nav_frame
         
         # Page navigation
         page_frame = ctk.CTkFrame(nav_frame)
@@ -521,58 +2064,51 @@ class EpisodeWindow:
                                  command=self.load_custom_range)
         range_btn.pack(side="left", padx=2)
         
-        # Add One Piece arc shortcuts if applicable
-        if "one piece" in self.anime_data.get('title', '').lower():
+        # Arc shortcuts if the index is already loaded
+        if self.arc_index:
             self.add_arc_shortcuts(nav_frame)
     
     def add_arc_shortcuts(self, parent):
-        """Add One Piece arc shortcuts"""
+        """Add arc/season shortcuts from the show's arc index"""
         arc_frame = ctk.CTkFrame(parent)
         arc_frame.pack(fill="x", padx=5, pady=5)
         
-        arcs = [
-            ("East Blue", 1, 61),
-            ("Alabasta", 62, 135),
-            ("Skypeia", 136, 206),
-            ("Water 7", 207, 325),
-            ("Thriller Bark", 326, 384),
-            ("Summit War", 385, 516),
-            ("Fishman Island", 517, 574),
-            ("Dressrosa", 575, 746),
-            ("Wano", 878, 1085),
-            ("Recent", 1086, self.total_episodes)
-        ]
+        arcs = {f"{name} ({start}-{end})": (start, end)
+                for name, start, end in self.arc_index.shortcuts(self.total_episodes)}
         
         ctk.CTkLabel(arc_frame, text="Quick Jump:", font=("Arial", 10, "bold")).pack(side="left", padx=5)
         
-        for arc_name, start, end in arcs[:6]:  # Show first 6 arcs
-            if start <= self.total_episodes:  # Only show arcs that exist
-                btn = ctk.CTkButton(arc_frame, text=arc_name, width=80, height=25,
-                                   command=lambda s=start, e=end: self.load_episode_range_by_numbers(s, e))
-                btn.pack(side="left", padx=2)
+        arc_menu = ctk.CTkOptionMenu(arc_frame, values=list(arcs), width=220, height=25,
+                                     command=lambda choice: self.load_episode_range_by_numbers(*arcs[choice]))
+        arc_menu.set("Choose arc...")
+        arc_menu.pack(side="left", padx=2)
+    
+    def _range_text(self, start_ep, end_ep):
+        """Range label text, with the arc of the first episode when known"""
+        text = f"{start_ep:03d}-{end_ep:03d}"
+        arc = self.arc_index.arc_for(start_ep) if self.arc_index else None
+        if arc:
+            text += f"  {arc[0]}"
+        return text
     
     def load_current_page(self):
         """Load episodes for current page"""
         # Clear episodes
         for widget in self.episodes_frame.winfo_children():
             widget.destroy()
+        self.episode_frames = {}
         
         # Calculate episode range for current page
         start_ep = (self.current_page - 1) * self.episodes_per_page + 1
         end_ep = min(self.current_page * self.episodes_per_page, self.total_episodes)
         
         # Update range label
-        self.range_label.configure(text=f"{start_ep:03d}-{end_ep:03d}")
+        self.range_label.configure(text=self._range_text(start_ep, end_ep))
+        self.shown_range = (start_ep, end_ep)
         
         # Load episodes for this page only
-        for i in range(start_ep, end_ep + 1):
-            episode_data = {
-                'number': i,
-                'title': f"Episode {i}",
-                'url': '',
-                'site': 'basic'
-            }
-            self.create_episode_widget(episode_data)
+        for episode in self.availability.iter_views(start_ep, end_ep, site='basic'):
+            self.create_episode_widget(episode)
         
         # Update page label
         total_pages = (self.total_episodes - 1) // self.episodes_per_page + 1
@@ -633,10 +2169,10 @@ class EpisodeWindow:
             start_ep = int(range_str)
             end_ep = min(start_ep + self.episodes_per_page - 1, self.total_episodes)
         
-        # Validate range
-        if start_ep < 1 or start_ep > self.total_episodes:
+        # Validate range against the released-episode bitset
+        if not self.availability.is_released(start_ep):
             raise ValueError(f"Start episode must be between 1 and {self.total_episodes}")
-        if end_ep < start_ep or end_ep > self.total_episodes:
+        if end_ep < start_ep or not self.availability.is_released(end_ep):
             end_ep = min(start_ep + self.episodes_per_page - 1, self.total_episodes)
         
         return start_ep, end_ep
@@ -646,19 +2182,15 @@ class EpisodeWindow:
         # Clear episodes
         for widget in self.episodes_frame.winfo_children():
             widget.destroy()
+        self.episode_frames = {}
         
         # Update range label
-        self.range_label.configure(text=f"{start_ep:03d}-{end_ep:03d}")
+        self.range_label.configure(text=self._range_text(start_ep, end_ep))
+        self.shown_range = (start_ep, end_ep)
         
         # Load episodes in range
-        for i in range(start_ep, end_ep + 1):
-            episode_data = {
-                'number': i,
-                'title': f"Episode {i}",
-                'url': '',
-                'site': 'custom'
-            }
-            self.create_episode_widget(episode_data)
+        for episode in self.availability.iter_views(start_ep, end_ep, site='custom'):
+            self.create_episode_widget(episode)
         
         # Update current page to match the range
         self.current_page = (start_ep - 1) // self.episodes_per_page + 1
@@ -674,12 +2206,19 @@ class EpisodeWindow:
         """Create a widget for an episode"""
         episode_frame = ctk.CTkFrame(self.episodes_frame)
         episode_frame.pack(fill="x", padx=10, pady=2)
+        self.episode_frames[episode_data.number] = episode_frame
         
         # Episode number and title
-        episode_text = f"{episode_data['number']}. {episode_data['title']}"
+        episode_text = f"{episode_data.number}. {episode_data.title}"
+        if episode_data.downloaded:
+            episode_text += "  (downloaded)"
         episode_label = ctk.CTkLabel(episode_frame, text=episode_text, font=("Arial", 12), anchor="w")
         episode_label.pack(fill="x", padx=15, pady=8)
         
+        # Dim episodes that no streaming site lists yet
+        if self.availability.has_provider_data() and not episode_data.available:
+            episode_label.configure(text_color="gray50")
+        
         # Make clickable
         def on_episode_click():
             self.select_episode(episode_frame, episode_data)
@@ -715,16 +2254,736 @@ class EpisodeWindow:
             return
         
         # Close episode window and play episode in main window
-        episode_number = self.selected_episode['number']
+        episode_number = self.selected_episode.number
         self.parent.episode_entry.delete(0, 'end')
         self.parent.episode_entry.insert(0, str(episode_number))
         self.window.destroy()
         
         # Play the episode
-        self.parent.play_selected_anime()
+        self.parent.play_selected_anime(self.anime_data)
+
+    def play_shown_range(self):
+        """Play every episode of the shown page, arc or custom range as one playlist"""
+        if not self.shown_range:
+            messagebox.showwarning("Warning", "Episodes are still loading")
+            return
+        
+        start_ep, end_ep = self.shown_range
+        self.parent.episode_entry.delete(0, 'end')
+        self.parent.episode_entry.insert(0, f"{start_ep}-{end_ep}" if end_ep > start_ep else str(start_ep))
+        self.window.destroy()
+        
+        self.parent.play_selected_anime(self.anime_data)
+
+class ProcessLauncher:
+    """Runs shell jobs in their own process group so the whole tree can be stopped"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or Settings()
+
+    def start(self, cmd: str, env: Dict = None, **popen_kwargs) -> subprocess.Popen:
+        """Start cmd under the configured shell as the leader of a new process group"""
+        if sys.platform == "win32":
+            popen_kwargs['creationflags'] = popen_kwargs.get('creationflags', 0) | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            popen_kwargs['start_new_session'] = True
+        
+        # Downloads land where the library index looks for them
+        popen_kwargs['env'] = dict(os.environ, ANI_CLI_DOWNLOAD_DIR=self.settings.download_dir, **(env or {}))
+        
+        return subprocess.Popen([self.settings.bash_path, "-c", cmd], **popen_kwargs)
+
+    def descendants(self, process: subprocess.Popen) -> List[Dict]:
+        """Live processes in the job's session other than the shell itself (ani-cli, curl, VLC...)"""
+        if sys.platform == "win32":
+            return []  # taskkill /T walks the tree for us
+        
+        members = []
+        if os.path.isdir('/proc'):
+            for entry in os.listdir('/proc'):
+                if not entry.isdigit() or int(entry) == process.pid:
+                    continue
+                info = self._read_proc_stat(int(entry))
+                if info and info['session'] == process.pid and info['state'] != 'Z':
+                    members.append({'pid': info['pid'], 'name': info['name']})
+            return members
+        
+        # No /proc (macOS, BSD): ask ps for the process group
+        try:
+            output = subprocess.run(['ps', '-A', '-o', 'pid=,pgid=,comm='],
+                                    capture_output=True, text=True, timeout=5).stdout
+        except (OSError, subprocess.SubprocessError):
+            return []
+        for line in output.splitlines():
+            parts = line.split(None, 2)
+            if len(parts) == 3 and int(parts[1]) == process.pid and int(parts[0]) != process.pid:
+                members.append({'pid': int(parts[0]), 'name': os.path.basename(parts[2])})
+        return members
+
+    @staticmethod
+    def _read_proc_stat(pid: int) -> Optional[Dict]:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                content = f.read()
+        except OSError:
+            return None
+        # The command name is in parentheses and may itself contain spaces
+        name_end = content.rfind(')')
+        fields = content[name_end + 2:].split()
+        return {
+            'pid': pid,
+            'name': content[content.find('(') + 1:name_end],
+            'state': fields[0],
+            'session': int(fields[3])
+        }
+
+    def _is_alive(self, pid: int) -> bool:
+        info = self._read_proc_stat(pid)
+        if info is not None:
+            return info['state'] != 'Z'
+        if os.path.isdir('/proc'):
+            return False
+        try:
+            os.kill(pid, 0)
+            return True
+        except OSError:
+            return False
+
+    def kill_tree(self, process: subprocess.Popen, timeout: float = None) -> List[Dict]:
+        """Terminate the job's whole process tree, force-killing whatever outlives the timeout.
+
+        Returns one entry per process with its exit status: the shell's return code,
+        or "terminated" / "killed" / "exited" for its descendants.
+        """
+        timeout = self.settings.kill_timeout if timeout is None else timeout
+        children = self.descendants(process)
+        
+        if sys.platform == "win32":
+            return self._kill_tree_windows(process, timeout)
+        
+        if process.poll() is None or children:
+            self._signal_group(process, children, signal.SIGTERM)
+        
+        # Wait for everything to exit on its own before escalating
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None and not any(self._is_alive(child['pid']) for child in children):
+                break
+            time.sleep(0.05)
+        
+        survivors = [child for child in children if self._is_alive(child['pid'])]
+        if process.poll() is None or survivors:
+            print(f"Force killing process group {process.pid}")
+            self._signal_group(process, survivors, signal.SIGKILL)
+        
+        try:
+            returncode = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            returncode = None
+        
+        results = [{'pid': process.pid, 'name': os.path.basename(self.settings.bash_path), 'status': returncode}]
+        survivor_pids = {child['pid'] for child in survivors}
+        for child in children:
+            results.append({
+                'pid': child['pid'],
+                'name': child['name'],
+                'status': 'killed' if child['pid'] in survivor_pids else 'terminated'
+            })
+        return results
+
+    def _signal_group(self, process, children, sig):
+        try:
+            os.killpg(process.pid, sig)
+        except OSError:
+            pass  # Group already gone
+        # Children that moved to their own group are still in the session
+        for child in children:
+            try:
+                os.kill(child['pid'], sig)
+            except OSError:
+                pass
+
+    def _kill_tree_windows(self, process, timeout):
+        subprocess.run(['taskkill', '/T', '/PID', str(process.pid)], capture_output=True)
+        try:
+            returncode = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            print(f"Force killing process tree {process.pid}")
+            subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)], capture_output=True)
+            returncode = process.wait()
+        return [{'pid': process.pid, 'name': os.path.basename(self.settings.bash_path), 'status': returncode}]
+
+class ProgressEvent:
+    """A typed event parsed from ani-cli or downloader output"""
+    __slots__ = ('kind', 'job', 'message', 'provider', 'url', 'percent', 'speed', 'eta')
+    RESOLVING = 'resolving'
+    PROVIDER = 'provider'
+    STREAM_URL = 'stream_url'
+    PLAYING = 'playing'
+    PROGRESS = 'progress'
+    ERROR = 'error'
+
+    def __init__(self, kind, job=None, message=None, provider=None, url=None,
+                 percent=None, speed=None, eta=None):
+        self.kind = kind
+        self.job = job
+        self.message = message
+        self.provider = provider
+        self.url = url
+        self.percent = percent
+        self.speed = speed  # Human-readable, as printed by the tool ("2.5MiB/s")
+        self.eta = eta
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__ if getattr(self, name) is not None}
+
+class EventBus:
+    """Minimal thread-safe publish/subscribe for progress events"""
 
-class AniCliGUI:
     def __init__(self):
+        self.subscribers = {}  # kind (None = all) -> list of callbacks
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback, kind: str = None):
+        with self.lock:
+            self.subscribers.setdefault(kind, []).append(callback)
+
+    def unsubscribe(self, callback, kind: str = None):
+        with self.lock:
+            if callback in self.subscribers.get(kind, []):
+                self.subscribers[kind].remove(callback)
+
+    def publish(self, event: ProgressEvent):
+        """Call subscribers in the publishing thread; they must hand off UI work themselves"""
+        with self.lock:
+            callbacks = self.subscribers.get(event.kind, []) + self.subscribers.get(None, [])
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error in event subscriber: {e}")
+
+class AniCliOutputParser:
+    """Turns ani-cli, yt-dlp, aria2c, ffmpeg and curl output lines into ProgressEvents"""
+    ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]|\x1b\][^\x07]*\x07')
+    # yt-dlp: "[download]  45.3% of ~300.00MiB at  2.50MiB/s ETA 01:05"
+    YTDLP_PROGRESS = re.compile(r'\[download\]\s+(?P<percent>[\d.]+)%(?:.*?\bat\s+(?P<speed>\S+))?(?:.*?ETA\s+(?P<eta>[\d:]+))?')
+    # aria2c: "[#2089b0 10MiB/300MiB(3%) CN:16 DL:2.5MiB ETA:1m55s]"
+    ARIA2_PROGRESS = re.compile(r'\[#\w+\s+\S+/\S+\((?P<percent>\d+)%\)(?:.*?DL:(?P<speed>\S+?))?(?:\s+ETA:(?P<eta>\w+))?\]')
+    # curl: " 45  300M   45  135M    0     0  2500k      0  0:02:00  0:00:54  0:01:06 2600k"
+    CURL_PROGRESS = re.compile(r'^\s*(?P<percent>\d{1,3})\s+\S+\s+\d{1,3}\s+\S+\s+\d+\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+\s+(?P<eta>[\d:-]+)\s+(?P<speed>\S+)\s*$')
+    # ffmpeg only prints elapsed media time, so percent needs the duration line
+    FFMPEG_DURATION = re.compile(r'Duration:\s*(?P<time>\d+:\d+:[\d.]+)')
+    FFMPEG_PROGRESS = re.compile(r'time=\s*(?P<time>\d+:\d+:[\d.]+).*?speed=\s*(?P<speed>\S+)')
+    PROVIDER = re.compile(r'^(?P<provider>.+?)\s+Links Fetched', re.IGNORECASE)
+    PLAYING = re.compile(r'^Playing episode\s+(?P<episode>\S+)', re.IGNORECASE)
+    LINK = re.compile(r'https?://\S+')
+    ERROR_MESSAGES = ("no results found", "episode not released", "no links found", "error", "failed")
+    RESOLVING_MESSAGES = ("checking", "fetching", "searching", "loading")
+
+    def __init__(self, job=None):
+        self.job = job
+        self.duration = None
+        self.expect_link = False
+
+    @staticmethod
+    def _seconds(timestamp: str) -> float:
+        hours, minutes, seconds = timestamp.split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    def parse_line(self, line: str) -> Optional[ProgressEvent]:
+        """Parse one output line; returns None for lines that carry no event"""
+        line = self.ANSI_ESCAPE.sub('', line).strip()
+        if not line:
+            return None
+        
+        # Cheap first-character checks keep the common progress lines fast
+        if line.startswith('[download]'):
+            match = self.YTDLP_PROGRESS.match(line)
+            if match:
+                return ProgressEvent(ProgressEvent.PROGRESS, self.job, percent=float(match.group('percent')),
+                                     speed=match.group('speed'), eta=match.group('eta'))
+        
+        if line.startswith('[#'):
+            match = self.ARIA2_PROGRESS.match(line)
+            if match:
+                speed = match.group('speed')
+                return ProgressEvent(ProgressEvent.PROGRESS, self.job, percent=float(match.group('percent')),
+                                     speed=f"{speed}/s" if speed else None, eta=match.group('eta'))
+        
+        if 'time=' in line:
+            match = self.FFMPEG_PROGRESS.search(line)
+            if match:
+                percent = None
+                if self.duration:
+                    percent = min(100.0, round(self._seconds(match.group('time')) / self.duration * 100, 1))
+                return ProgressEvent(ProgressEvent.PROGRESS, self.job, percent=percent, speed=match.group('speed'))
+        
+        if line[0].isdigit():
+            match = self.CURL_PROGRESS.match(line)
+            if match:
+                eta = match.group('eta')
+                return ProgressEvent(ProgressEvent.PROGRESS, self.job, percent=float(match.group('percent')),
+                                     speed=f"{match.group('speed')}B/s", eta=None if '-' in eta else eta)
+        
+        if line.startswith('Duration:'):
+            match = self.FFMPEG_DURATION.match(line)
+            if match:
+                self.duration = self._seconds(match.group('time')) or None
+            return None
+        
+        if self.expect_link:
+            match = self.LINK.search(line)
+            if match:
+                self.expect_link = False
+                return ProgressEvent(ProgressEvent.STREAM_URL, self.job, url=match.group(0))
+        
+        if line.startswith('Selected link:'):
+            self.expect_link = True
+            return None
+        
+        match = self.PROVIDER.match(line)
+        if match:
+            return ProgressEvent(ProgressEvent.PROVIDER, self.job, provider=match.group('provider'), message=line)
+        
+        match = self.PLAYING.match(line)
+        if match:
+            return ProgressEvent(ProgressEvent.PLAYING, self.job, message=line)
+        
+        lowered = line.lower()
+        if lowered.startswith(self.ERROR_MESSAGES):
+            return ProgressEvent(ProgressEvent.ERROR, self.job, message=line)
+        if lowered.startswith(self.RESOLVING_MESSAGES):
+            return ProgressEvent(ProgressEvent.RESOLVING, self.job, message=line)
+        return None
+
+class StreamResolver:
+    """Resolves episode stream URLs by running ani-cli with its debug player"""
+    LINK_PATTERN = re.compile(r'https?://\S+')
+
+    def __init__(self, launcher, settings=None):
+        self.launcher = launcher
+        self.settings = settings or Settings()
+
+    def resolve(self, anime_name: str, episode: int, timeout: float = 120, on_start=None) -> Optional[str]:
+        """Return the stream URL ani-cli would play for one episode"""
+        cmd = build_ani_cli_command(anime_name, str(episode), settings=self.settings, use_player=False)
+        process = self.launcher.start(cmd, env={'ANI_CLI_PLAYER': 'debug'},
+                                      stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        if on_start:
+            on_start(process)  # Lets the caller stop a slow resolution
+        try:
+            output, _ = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.launcher.kill_tree(process)
+            print(f"Timed out resolving {anime_name} episode {episode}")
+            return None
+        return self.parse_debug_output(output)
+
+    def resolve_many(self, anime_name: str, episodes: List[int], workers: int = None, on_start=None,
+                     on_resolved=None, cancel: threading.Event = None) -> Dict[int, str]:
+        """Resolve several episodes at once with at most `workers` ani-cli lookups running"""
+        workers = max(1, min(workers or self.settings.playlist_workers, len(episodes) or 1))
+        urls = {}
+        
+        def resolve_one(number):
+            if cancel and cancel.is_set():
+                return number, None
+            return number, self.resolve(anime_name, number, on_start=on_start)
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resolve") as executor:
+            futures = [executor.submit(resolve_one, number) for number in episodes]
+            for future in as_completed(futures):
+                try:
+                    number, url = future.result()
+                except Exception as e:
+                    print(f"Error resolving {anime_name}: {e}")
+                    continue
+                if url:
+                    urls[number] = url
+                if on_resolved:
+                    on_resolved(number, url)
+        return urls
+
+    @classmethod
+    def parse_debug_output(cls, output: str) -> Optional[str]:
+        """Pick the link printed after "Selected link:" by ani-cli's debug player"""
+        lines = output.splitlines()
+        for index, line in enumerate(lines):
+            if line.strip().startswith("Selected link:"):
+                for candidate in lines[index:]:
+                    match = cls.LINK_PATTERN.search(candidate)
+                    if match:
+                        return match.group(0)
+        return None
+
+class BandwidthLimiter:
+    """Token bucket shared by every download so the cap is global"""
+
+    def __init__(self, bytes_per_second: int = 0):
+        self.rate = bytes_per_second
+        self.tokens = float(bytes_per_second)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, nbytes: int):
+        """Block until nbytes may be transferred"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                # Allow at most one second of burst
+                self.tokens = min(self.rate, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= nbytes or self.tokens >= self.rate:
+                    self.tokens -= nbytes
+                    return
+                wait_time = (min(nbytes, self.rate) - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+class DownloadCancelled(Exception):
+    """Raised inside a download when its job is cancelled"""
+
+class IncompleteDownload(IOError):
+    """Raised when the server closed the connection before sending the whole body"""
+
+class DownloadJob:
+    """State of one download, shared with progress callbacks"""
+
+    def __init__(self, url: str, path: str, headers: Dict = None, expected_sha256: str = None):
+        self.url = url
+        self.path = path
+        self.headers = headers or {}
+        self.expected_sha256 = expected_sha256
+        self.total_bytes = 0
+        self.done_bytes = 0
+        self.segments_total = 0
+        self.segments_done = 0
+        self.started_at = time.monotonic()
+        self.state = 'queued'  # queued, running, done, cancelled, failed
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def add_bytes(self, nbytes: int):
+        with self.lock:
+            self.done_bytes += nbytes
+
+    def fraction(self) -> Optional[float]:
+        if self.segments_total:
+            return self.segments_done / self.segments_total
+        if self.total_bytes:
+            return min(1.0, self.done_bytes / self.total_bytes)
+        return None
+
+    def speed(self) -> float:
+        """Average bytes per second since the job started"""
+        elapsed = time.monotonic() - self.started_at
+        return self.done_bytes / elapsed if elapsed > 0 else 0.0
+
+class DownloadEngine:
+    """Resumable, checksummed downloads of direct files and HLS streams"""
+    CHUNK_SIZE = 64 * 1024
+    SEGMENT_RETRIES = 3  # Extra attempts for a segment after a transient error
+    RETRY_BACKOFF = 0.5  # Seconds before the first retry, doubled after each attempt
+
+    def __init__(self, settings=None, session=None):
+        self.settings = settings or Settings()
+        self.session = session or requests.Session()
+        self.session.headers.setdefault('User-Agent', 'AniCLI-GUI/1.0')
+        self.limiter = BandwidthLimiter(self.settings.download_rate_limit * 1024)
+
+    def download(self, job: DownloadJob, progress=None) -> DownloadJob:
+        """Run a job to completion; partial data is kept for resuming on failure or cancel"""
+        job.state = 'running'
+        os.makedirs(os.path.dirname(os.path.abspath(job.path)), exist_ok=True)
+        try:
+            if '.m3u8' in urlparse(job.url).path:
+                self._download_hls(job, progress)
+            else:
+                self._download_file(job, job.url, job.path, progress)
+                self._finish_file(job, job.path)
+            job.state = 'done'
+        except DownloadCancelled:
+            job.state = 'cancelled'
+        except Exception as e:
+            job.state = 'failed'
+            job.error = str(e)
+            print(f"Download failed for {job.path}: {e}")
+        if progress:
+            progress(job)
+        return job
+
+    def _download_file(self, job: DownloadJob, url: str, path: str, progress=None, track_total: bool = True) -> str:
+        """Fetch url into path, resuming from path.part with a range request; returns the sha256"""
+        if job.cancel_event.is_set():
+            raise DownloadCancelled()
+        part_path = path + '.part'
+        meta_path = path + '.part.json'
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        
+        meta = {}
+        if offset and os.path.exists(meta_path):
+            try:
+                with open(meta_path, encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {}
+        
+        headers = dict(job.headers)
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+            # If-Range makes the server send the whole file if it changed since the partial
+            validator = meta.get('etag') or meta.get('last_modified')
+            if validator:
+                headers['If-Range'] = validator
+        
+        with self.session.get(url, headers=headers, stream=True, timeout=self.settings.request_timeout) as response:
+            if response.status_code == 416:
+                # Range not satisfiable: the partial is already complete
+                response.close()
+            else:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    offset = 0  # Server ignored the range or the file changed
+                
+                length = response.headers.get('Content-Length')
+                expected_size = offset + int(length) if length else None
+                if track_total and expected_size:
+                    with job.lock:
+                        job.total_bytes += expected_size
+                        job.done_bytes += offset
+                
+                with open(meta_path, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'url': url,
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'size': expected_size
+                    }, f)
+                
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(self.CHUNK_SIZE):
+                        if job.cancel_event.is_set():
+                            raise DownloadCancelled()
+                        self.limiter.consume(len(chunk))
+                        f.write(chunk)
+                        job.add_bytes(len(chunk))
+                        if progress:
+                            progress(job)
+                
+                if expected_size is not None and os.path.getsize(part_path) != expected_size:
+                    raise IncompleteDownload(f"Incomplete download: {os.path.getsize(part_path)} of {expected_size} bytes")
+        
+        digest = self._sha256(part_path)
+        os.replace(part_path, path)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        return digest
+
+    def _finish_file(self, job: DownloadJob, path: str):
+        """Verify the finished file and record its checksum next to it"""
+        digest = self._sha256(path)
+        if job.expected_sha256 and digest != job.expected_sha256.lower():
+            os.remove(path)
+            raise IOError(f"Checksum mismatch for {path}")
+        with open(path + '.sha256', 'w', encoding='utf-8') as f:
+            f.write(f"{digest}  {os.path.basename(path)}\n")
+
+    def _download_hls(self, job: DownloadJob, progress=None):
+        """Fetch every segment of an HLS stream in parallel, then join them in order"""
+        segments = self._resolve_segments(job)
+        parts_dir = job.path + '.parts'
+        os.makedirs(parts_dir, exist_ok=True)
+        manifest_path = os.path.join(parts_dir, 'manifest.json')
+        manifest = {}
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = {}
+        
+        # Segments finished in an earlier run are kept if their checksum still matches
+        todo = []
+        for index, url in enumerate(segments):
+            segment_path = os.path.join(parts_dir, f'{index:05d}.ts')
+            recorded = manifest.get(str(index))
+            if recorded and os.path.exists(segment_path) and self._sha256(segment_path) == recorded:
+                continue
+            todo.append((index, url, segment_path))
+        
+        job.segments_total = len(segments)
+        job.segments_done = len(segments) - len(todo)
+        manifest_lock = threading.Lock()
+        
+        def fetch(item):
+            index, url, segment_path = item
+            for attempt in range(self.SEGMENT_RETRIES + 1):
+                try:
+                    digest = self._download_file(job, url, segment_path, track_total=False)
+                    break
+                except DownloadCancelled:
+                    raise
+                except Exception as e:
+                    if attempt == self.SEGMENT_RETRIES or not self._is_transient(e):
+                        raise
+                    print(f"Retrying segment {index} after error: {e}")
+                    if job.cancel_event.wait(self.RETRY_BACKOFF * 2 ** attempt):
+                        raise DownloadCancelled()
+            with manifest_lock:
+                manifest[str(index)] = digest
+                with open(manifest_path, 'w', encoding='utf-8') as f:
+                    json.dump(manifest, f)
+                job.segments_done += 1
+            if progress:
+                progress(job)
+        
+        with ThreadPoolExecutor(max_workers=max(1, self.settings.download_workers)) as executor:
+            futures = [executor.submit(fetch, item) for item in todo]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # Drop queued segments and stop running ones, keep finished segments
+                for future in futures:
+                    future.cancel()
+                job.cancel()
+                raise
+        
+        # Join segments into the final file, then verify it
+        with open(job.path + '.part', 'wb') as output:
+            for index in range(len(segments)):
+                with open(os.path.join(parts_dir, f'{index:05d}.ts'), 'rb') as segment:
+                    shutil.copyfileobj(segment, output)
+        os.replace(job.path + '.part', job.path)
+        self._finish_file(job, job.path)
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    def _resolve_segments(self, job: DownloadJob) -> List[str]:
+        """Segment URLs of the media playlist, picking the best variant of a master playlist"""
+        url = job.url
+        for _ in range(3):  # Master -> media playlist, with a little slack
+            response = self.session.get(url, headers=job.headers, timeout=self.settings.request_timeout)
+            response.raise_for_status()
+            lines = [line.strip() for line in response.text.splitlines() if line.strip()]
+            
+            if any(line.startswith('#EXT-X-KEY') and 'METHOD=NONE' not in line for line in lines):
+                raise IOError("Encrypted HLS streams are not supported, untick the built-in download engine")
+            # Segments are joined into a plain .ts, which fMP4 init sections and byte ranges would corrupt
+            if any(line.startswith(('#EXT-X-MAP', '#EXT-X-BYTERANGE')) for line in lines):
+                raise IOError("fMP4 and byte-range HLS streams are not supported, untick the built-in download engine")
+            
+            variants = []
+            for index, line in enumerate(lines):
+                if line.startswith('#EXT-X-STREAM-INF') and index + 1 < len(lines):
+                    match = re.search(r'BANDWIDTH=(\d+)', line)
+                    variants.append((int(match.group(1)) if match else 0, urljoin(url, lines[index + 1])))
+            if variants:
+                url = max(variants)[1]
+                continue
+            
+            return [urljoin(url, line) for line in lines if not line.startswith('#')]
+        raise IOError("Could not find a media playlist")
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Errors worth retrying: connection problems, timeouts, 5xx/429 and truncated bodies"""
+        if isinstance(error, requests.exceptions.HTTPError):
+            status = error.response.status_code if error.response is not None else 0
+            return status >= 500 or status == 429
+        return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                                  requests.exceptions.ChunkedEncodingError, IncompleteDownload))
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+class SettingsWindow:
+    def __init__(self, parent, settings):
+        self.parent = parent
+        self.settings = settings
+        self.inputs = {}
+        
+        # Create new window
+        self.window = ctk.CTkToplevel(parent.root)
+        self.window.title("Settings")
+        self.window.geometry("520x600")
+        self.window.grab_set()  # Make window modal
+        
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """Setup one input per setting, grouped by section"""
+        main_frame = ctk.CTkScrollableFrame(self.window)
+        main_frame.pack(fill="both", expand=True, padx=20, pady=(20, 10))
+        main_frame.grid_columnconfigure(1, weight=1)
+        
+        row = 0
+        section = None
+        for field in dataclasses.fields(self.settings):
+            if field.metadata.get('section') != section:
+                section = field.metadata.get('section')
+                section_label = ctk.CTkLabel(main_frame, text=section, font=("Arial", 14, "bold"))
+                section_label.grid(row=row, column=0, columnspan=2, sticky="w", padx=10, pady=(15, 5))
+                row += 1
+            
+            label = ctk.CTkLabel(main_frame, text=field.metadata.get('label', field.name), anchor="w")
+            label.grid(row=row, column=0, sticky="w", padx=(20, 10), pady=3)
+            
+            value = getattr(self.settings, field.name)
+            if field.type in (bool, 'bool'):
+                variable = ctk.BooleanVar(value=value)
+                ctk.CTkCheckBox(main_frame, text="", variable=variable).grid(row=row, column=1, sticky="w", pady=3)
+                self.inputs[field.name] = variable
+            else:
+                entry = ctk.CTkEntry(main_frame)
+                entry.insert(0, str(value))
+                entry.grid(row=row, column=1, sticky="ew", padx=(0, 10), pady=3)
+                self.inputs[field.name] = entry
+            row += 1
+        
+        note_label = ctk.CTkLabel(self.window, text="Network, cache and concurrency changes apply after a restart.",
+                                  font=("Arial", 11))
+        note_label.pack(padx=20)
+        
+        # Buttons frame
+        buttons_frame = ctk.CTkFrame(self.window)
+        buttons_frame.pack(fill="x", padx=20, pady=10)
+        
+        save_button = ctk.CTkButton(buttons_frame, text="Save", command=self.save)
+        save_button.pack(side="left", padx=5, pady=10)
+        
+        close_button = ctk.CTkButton(buttons_frame, text="Close", command=self.window.destroy)
+        close_button.pack(side="right", padx=5, pady=10)
+    
+    def save(self):
+        """Apply and persist the entered settings"""
+        errors = self.settings.update({name: widget.get() for name, widget in self.inputs.items()})
+        if errors:
+            messagebox.showerror("Error", "Invalid settings:\n" + "\n".join(errors))
+            return
+        
+        try:
+            self.settings.save()
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save settings: {e}")
+            return
+        
+        self.parent.update_status(f"Settings saved to {self.settings.path}")
+        self.window.destroy()
+
+class AniCliGUI:
+    def __init__(self, settings=None):
+        self.settings = settings or Settings.load()
         self.root = ctk.CTk()
         self.root.title("Ani-CLI GUI")
         self.root.geometry("1000x700")
@@ -734,10 +2993,40 @@ class AniCliGUI:
         # Initialize variables
         self.selected_anime = None
         self.current_process = None
-        self.git_bash_path = r"C:\Program Files\Git\bin\bash.exe"
         
-        # Initialize API
-        self.api = AnimeSearchAPI()
+        # Initialize API, process launcher and local watch history
+        self.api = AnimeSearchAPI(self.settings)
+        self.launcher = ProcessLauncher(self.settings)
+        self.history = WatchHistory()
+        
+        # Built-in resumable downloads of ani-cli resolved streams
+        self.resolver = StreamResolver(self.launcher, self.settings)
+        self.downloads = DownloadEngine(self.settings)
+        self.downloading = False
+        self.current_download = None
+        self.download_cancel = threading.Event()
+        
+        # Episode ranges are resolved in parallel and played as one playlist
+        self.building_playlist = False
+        self.resolving_processes = set()
+        self.resolving_lock = threading.Lock()
+        self.playlist_cancel = threading.Event()
+        
+        # Progress from ani-cli output and downloads is published as events
+        self.events = EventBus()
+        self.events.subscribe(self._on_progress_event)
+        self.last_progress_update = 0.0
+        
+        # Index of already downloaded episodes
+        self.library = DownloadLibrary(self.settings)
+        self.library.start()
+        
+        # Keep episode counts of airing shows fresh in the background
+        self.airing_scheduler = AiringScheduler(self.api, self.history, on_new_episode=self._on_new_episode)
+        self.airing_scheduler.start()
+        
+        # Speculatively resolve episode data for results the user is likely to open
+        self.prefetch = PrefetchQueue(self.api, self.settings.prefetch_jobs_per_minute)
         
         self.setup_ui()
 
@@ -780,9 +3069,15 @@ class AniCliGUI:
         play_direct_button = ctk.CTkButton(button_frame, text="Play Direct", command=self.play_anime)
         play_direct_button.pack(side="left", padx=5, pady=10)
         
+        continue_button = ctk.CTkButton(button_frame, text="Continue Watching", command=self.show_recently_watched)
+        continue_button.pack(side="left", padx=5, pady=10)
+        
         stop_button = ctk.CTkButton(button_frame, text="Stop", command=self.stop_process, fg_color="red")
         stop_button.pack(side="right", padx=5, pady=10)
         
+        settings_button = ctk.CTkButton(button_frame, text="Settings", command=self.open_settings_window)
+        settings_button.pack(side="right", padx=5, pady=10)
+        
         # Status bar
         self.status_label = ctk.CTkLabel(self.main_frame, text="Starting selected anime", anchor="w")
         self.status_label.pack(fill="x", padx=20, pady=(10, 0))
@@ -818,8 +3113,11 @@ class AniCliGUI:
             return
         
         episode = self.episode_entry.get().strip() or "1"
+        if not EPISODE_SPEC_PATTERN.match(episode):
+            messagebox.showwarning("Warning", "Episode(s) must be numbers or ranges, e.g. 3, 1-5 or 1 4 7")
+            return
         
-        if self.current_process:
+        if self.current_process or self.building_playlist or self.downloading:
             messagebox.showinfo("Info", "Another process is already running. Please stop it first.")
             return
         
@@ -827,7 +3125,7 @@ class AniCliGUI:
         
         # Build and run command
         cmd = self.build_command(query)
-        self.run_ani_cli_command(cmd)
+        self.run_ani_cli_command(cmd, f"{query} episode {episode}")
 
     def search_anime(self):
         """Search for anime using the API"""
@@ -848,9 +3146,34 @@ class AniCliGUI:
 
     def _search_anime_thread(self, query):
         """Search for anime in a separate thread"""
-        results = self.api.search_anime_jikan(query)
+        results = self.api.search_anime(query)
         # Update UI from main thread
         self.root.after(0, self._update_search_results, results)
+        
+        # Warm the AniList cache for the whole page in one round trip
+        self.api.get_anilist_media_batch([anime['mal_id'] for anime in results if anime.get('mal_id')])
+        
+        # Then warm episode windows for the top results
+        for anime in results[:self.settings.prefetch_top_results]:
+            self.prefetch.request(anime.get('mal_id'), PrefetchQueue.WARM)
+
+    def show_recently_watched(self):
+        """Show recently watched anime in the results list"""
+        for widget in self.results_scrollable.winfo_children():
+            widget.destroy()
+        self.selected_anime = None
+        
+        recent = self.history.recently_watched()
+        if not recent:
+            no_history_label = ctk.CTkLabel(self.results_scrollable, text="No watch history yet.")
+            no_history_label.pack(pady=20)
+            self.update_status("No watch history")
+            return
+        
+        for anime in recent:
+            self._create_anime_result_widget(anime)
+        
+        self.update_status(f"{len(recent)} recently watched")
 
     def _update_search_results(self, results):
         """Update search results in the UI"""
@@ -917,10 +3240,14 @@ class AniCliGUI:
             self._highlight_selected_result(result_frame, anime)
             self.open_episode_window(anime)
         
+        def on_hover():
+            self.prefetch.request(anime.get('mal_id'), PrefetchQueue.HOVER)
+        
         for widget in [result_frame, content_frame, info_frame]:
             widget.bind("<Button-1>", lambda e: on_click())
             widget.bind("<Double-Button-1>", lambda e: on_double_click())
             widget.configure(cursor="hand2")
+        result_frame.bind("<Enter>", lambda e: on_hover())
 
     def _display_image(self, parent, image, click_callback, double_click_callback=None):
         """Display an image in the parent widget"""
@@ -935,7 +3262,8 @@ class AniCliGUI:
         except Exception as e:
             print(f"Error displaying image: {e}")
             # Fallback to text label if image fails
-            placeholder_label = ctk.CTkLabel(parent, text="[Image]", cursor="hand2", width=80, height=120)
+            placeholder_label = ctk.CTkLabel(parent, text="[Image]", cursor="hand2",
+                                             width=self.settings.image_width, height=self.settings.image_height)
             placeholder_label.pack(padx=5, pady=5)
             placeholder_label.bind("<Button-1>", lambda e: click_callback())
             if double_click_callback:
@@ -951,80 +3279,269 @@ class AniCliGUI:
         # Highlight selected frame
         selected_frame.configure(border_width=2, border_color="blue")
         
-        # Store selected anime
+        # Store selected anime and start resolving its episodes
         self.selected_anime = anime
-        self.update_status(f"Selected: {anime.get('title', 'Unknown')}")
+        self.prefetch.request(anime.get('mal_id'), PrefetchQueue.SELECTED)
+        
+        next_episode = None
+        if anime.get('mal_id'):
+            next_episode = self.history.next_unwatched_episode(anime['mal_id'])
+        if next_episode:
+            self.update_status(f"Selected: {anime.get('title', 'Unknown')} (continue from episode {next_episode})")
+        else:
+            self.update_status(f"Selected: {anime.get('title', 'Unknown')}")
 
-    def play_selected_anime(self):
+    def play_selected_anime(self, anime=None):
         """Play the selected anime"""
-        if not self.selected_anime:
+        anime = anime or self.selected_anime
+        if not anime:
             messagebox.showwarning("Warning", "Please select an anime first")
             return
         
-        if self.current_process:
+        if self.current_process or self.building_playlist or self.downloading:
             messagebox.showinfo("Info", "Another process is already running. Please stop it first.")
             return
         
-        anime_title = self.selected_anime.get('title', 'Unknown')
+        anime_title = anime.get('title', 'Unknown')
         episode = self.episode_entry.get().strip() or "1"
+        if not EPISODE_SPEC_PATTERN.match(episode):
+            messagebox.showwarning("Warning", "Episode(s) must be numbers or ranges, e.g. 3, 1-5 or 1 4 7")
+            return
         
         self.update_status(f"Starting {anime_title} episode {episode}...")
+        # Downloading an episode isn't watching it
+        if not self.download_var.get():
+            self.history.record(anime, expand_episode_spec(episode))
+        if anime.get('mal_id'):
+            self.airing_scheduler.follow(anime['mal_id'])
+        
+        # Downloaded episodes play straight from disk, no network resolution needed
+        if not self.download_var.get():
+            local_files = [self.library.find(anime_title, number) for number in expand_episode_spec(episode)]
+            if local_files and all(local_files):
+                self.update_status(f"Playing {anime_title} episode {episode} from disk...")
+                self.run_ani_cli_command(build_local_play_command(local_files, self.settings))
+                return
+        
+        if self.download_var.get():
+            # Don't fetch (and overwrite) episodes that are already on disk
+            episodes = [number for number in expand_episode_spec(episode) if not self.library.find(anime_title, number)]
+            if not episodes:
+                self.update_status(f"{anime_title} episode {episode} is already downloaded")
+                return
+            skipped = sorted(set(expand_episode_spec(episode)) - set(episodes))
+            if skipped:
+                print(f"Skipping already downloaded {anime_title} episode(s) {', '.join(episode_ranges(skipped))}")
+            if self.settings.download_engine:
+                self.start_engine_download(anime_title, episodes)
+            else:
+                specs = episode_ranges(episodes)
+                cmd = '; '.join(build_ani_cli_command(anime_title, spec, True, self.settings) for spec in specs)
+                self.run_ani_cli_command(cmd, f"{anime_title} episode {', '.join(specs)}")
+            return
+        
+        # Several episodes play back to back in a single player session
+        if not self.download_var.get() and len(expand_episode_spec(episode)) > 1:
+            self.play_playlist(anime_title, expand_episode_spec(episode))
+            return
         
         # Build and run command
         cmd = self.build_command(anime_title)
-        self.run_ani_cli_command(cmd)
+        self.run_ani_cli_command(cmd, f"{anime_title} episode {episode}")
+
+    def start_engine_download(self, anime_title, episodes):
+        """Resolve each episode's stream with ani-cli and download it with the built-in engine"""
+        if self.downloading:
+            messagebox.showinfo("Info", "A download is already running. Please stop it first.")
+            return
+        
+        self.downloading = True
+        self.download_cancel.clear()
+        file_title = re.sub(r'[^\w\s-]', '', anime_title).strip()
+        
+        def run_downloads():
+            finished = 0
+            try:
+                for number in episodes:
+                    if self.download_cancel.is_set():
+                        break
+                    self.root.after(0, lambda n=number: self.update_status(f"Resolving {anime_title} episode {n}..."))
+                    url = self.resolver.resolve(anime_title, number, on_start=self._add_download_resolver)
+                    with self.resolving_lock:
+                        self.resolving_processes.clear()  # The resolver has exited
+                    if not url:
+                        if not self.download_cancel.is_set():
+                            self.root.after(0, lambda n=number: self.update_status(f"Could not resolve episode {n}"))
+                        continue
+                    
+                    extension = '.ts' if '.m3u8' in urlparse(url).path else '.mp4'
+                    path = os.path.join(self.settings.download_dir, f"{file_title} Episode {number}{extension}")
+                    job = DownloadJob(url, path, headers={'Referer': self.settings.stream_referer})
+                    self.current_download = job
+                    self.downloads.download(job, progress=self._on_download_progress)
+                    if job.state == 'done':
+                        finished += 1
+                    elif job.state == 'failed':
+                        self.root.after(0, lambda e=job.error: self.update_status(f"Download failed: {e}"))
+            except Exception as e:
+                print(f"Error in download loop: {e}")
+                self.root.after(0, lambda e=e: self.update_status(f"Download failed: {e}"))
+                return
+            finally:
+                self.current_download = None
+                self.downloading = False
+            
+            if self.download_cancel.is_set():
+                self.root.after(0, lambda: self.update_status("Download stopped, it will resume next time"))
+            else:
+                self.root.after(0, lambda: self.update_status(f"Downloaded {finished} of {len(episodes)} episodes"))
+        
+        # Run in separate thread
+        threading.Thread(target=run_downloads, daemon=True).start()
+
+    def play_playlist(self, anime_title, episodes):
+        """Resolve all episodes concurrently, then play them as one playlist"""
+        self.building_playlist = True
+        self.playlist_cancel.clear()
+        resolved = []
+        
+        def on_resolved(number, url):
+            resolved.append(number)
+            self.root.after(0, lambda n=len(resolved): self.update_status(
+                f"Resolving {anime_title}: {n}/{len(episodes)} episodes..."))
+        
+        def build():
+            try:
+                # Downloaded episodes go into the playlist as local files
+                local_files = {number: self.library.find(anime_title, number) for number in episodes}
+                missing = [number for number in episodes if not local_files[number]]
+                urls = self.resolver.resolve_many(anime_title, missing, on_start=self._add_resolving_process,
+                                                  on_resolved=on_resolved, cancel=self.playlist_cancel)
+                if self.playlist_cancel.is_set():
+                    self.root.after(0, lambda: self.update_status("Playlist cancelled"))
+                    return
+                
+                entries = []
+                for number in episodes:
+                    location = local_files[number] or urls.get(number)
+                    if location:
+                        entries.append((f"{anime_title} Episode {number}", location))
+                    else:
+                        print(f"Skipping {anime_title} episode {number}: no stream found")
+                if not entries:
+                    self.root.after(0, lambda: self.update_status("No streams found for the selected episodes"))
+                    return
+                
+                file_title = re.sub(r'[^\w\s-]', '', anime_title).strip()
+                playlist_path = write_playlist(os.path.join(DATA_DIR, "playlists", f"{file_title}.m3u"),
+                                               entries, self.settings.stream_referer)
+                self.root.after(0, lambda: self.run_ani_cli_command(
+                    build_playlist_play_command(playlist_path, self.settings),
+                    f"{anime_title} ({len(entries)} episodes)"
+                ))
+            except Exception as e:
+                print(f"Error building playlist: {e}")
+                self.root.after(0, lambda e=e: self.update_status(f"Error: {str(e)}"))
+            finally:
+                with self.resolving_lock:
+                    self.resolving_processes.clear()
+                self.building_playlist = False
+        
+        self.update_status(f"Resolving {anime_title}: 0/{len(episodes)} episodes...")
+        threading.Thread(target=build, daemon=True).start()
+
+    def _add_resolving_process(self, process):
+        with self.resolving_lock:
+            self.resolving_processes.add(process)
+        if self.playlist_cancel.is_set():
+            # Started after Stop was pressed
+            threading.Thread(target=self.launcher.kill_tree, args=(process,), daemon=True).start()
+
+    def _add_download_resolver(self, process):
+        with self.resolving_lock:
+            self.resolving_processes.add(process)
+        if self.download_cancel.is_set():
+            # Started after Stop was pressed
+            threading.Thread(target=self.launcher.kill_tree, args=(process,), daemon=True).start()
+
+    def _on_download_progress(self, job):
+        """Called from download threads for every chunk"""
+        if job.state != 'running':
+            return  # Final states are reported by the download loop
+        fraction = job.fraction()
+        self.events.publish(ProgressEvent(
+            ProgressEvent.PROGRESS, os.path.basename(job.path),
+            percent=round(fraction * 100, 1) if fraction is not None else None,
+            speed=f"{job.speed() / 1e6:.1f}MB/s"
+        ))
+
+    def _on_progress_event(self, event):
+        """Show events in the status bar; progress is throttled to a few updates per second"""
+        if event.kind == ProgressEvent.PROGRESS:
+            now = time.monotonic()
+            if now - self.last_progress_update < 0.25:
+                return
+            self.last_progress_update = now
+            percent = f"{event.percent:.0f}%" if event.percent is not None else "..."
+            message = f"Downloading {event.job or ''}: {percent}"
+            if event.speed:
+                message += f" at {event.speed}"
+            if event.eta:
+                message += f", ETA {event.eta}"
+        elif event.kind == ProgressEvent.PROVIDER:
+            message = f"Links fetched from {event.provider}"
+        elif event.kind == ProgressEvent.STREAM_URL:
+            message = "Stream found, starting player..."
+        elif event.kind == ProgressEvent.ERROR:
+            message = f"Error: {event.message}"
+        else:
+            message = event.message
+        self.root.after(0, lambda: self.update_status(message))
+
+    def _on_new_episode(self, mal_id, title, episode_count):
+        """Called from the scheduler thread when a followed show gets a new episode"""
+        self.root.after(0, lambda: self.update_status(f"New episode available: {title} episode {episode_count}"))
 
     def open_episode_window(self, anime_data):
         """Open the episode selection window"""
         EpisodeWindow(self, anime_data, self.api)
 
+    def open_settings_window(self):
+        """Open the settings dialog"""
+        SettingsWindow(self, self.settings)
+
     def build_command(self, anime_name=None):
         """Build the ani-cli command"""
         if not anime_name:
             anime_name = self.search_entry.get().strip()
         
         episode = self.episode_entry.get().strip() or "1"
-        
-        # Base command with automatic VLC and best quality
-        cmd_parts = [
-            'export PATH="$PATH:/c/Program Files/VideoLAN/VLC";',
-            'ani-cli',
-            '-S', '1',  # Use first provider (fastest)
-            '-q', 'best',  # Always use best quality
-            '-e', episode,
-            '-v',  # Use VLC player
-            f'"{anime_name}"'
-        ]
-        
-        # Add download option if selected
-        if self.download_var.get():
-            cmd_parts.insert(-1, '-d')
-        
-        return ' '.join(cmd_parts)
+        return build_ani_cli_command(anime_name, episode, self.download_var.get(), self.settings)
 
-    def run_ani_cli_command(self, cmd):
+    def run_ani_cli_command(self, cmd, episode_label=None):
         """Run ani-cli command in a separate thread"""
         def run_command():
             try:
                 self.update_status("Running command...")
                 print(f"Running command: {cmd}")
                 
-                self.current_process = subprocess.Popen(
-                    [self.git_bash_path, "-c", cmd],
+                self.current_process = self.launcher.start(
+                    cmd,
                     stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
                     text=True,
                     bufsize=1,
-                    universal_newlines=True
+                    universal_newlines=True  # Also splits the \r-terminated progress lines
                 )
                 
-                # Wait for process to complete
-                stdout, stderr = self.current_process.communicate()
-                
-                if stdout:
-                    print(f"Output: {stdout}")
-                if stderr:
-                    print(f"Error: {stderr}")
+                # Stream output through the parser as it arrives
+                parser = AniCliOutputParser(job=episode_label)
+                for line in self.current_process.stdout:
+                    print(f"Output: {line.rstrip()}")
+                    event = parser.parse_line(line)
+                    if event:
+                        self.events.publish(event)
+                self.current_process.wait()
                 
                 if self.current_process.returncode == 0:
                     self.root.after(0, lambda: self.update_status("Playback completed"))
@@ -1032,7 +3549,7 @@ class AniCliGUI:
                     self.root.after(0, lambda: self.update_status("Command failed"))
                     
             except Exception as e:
-                self.root.after(0, lambda: self.update_status(f"Error: {str(e)}"))
+                self.root.after(0, lambda e=e: self.update_status(f"Error: {str(e)}"))
                 print(f"Exception: {e}")
             finally:
                 self.current_process = None
@@ -1041,15 +3558,40 @@ class AniCliGUI:
         threading.Thread(target=run_command, daemon=True).start()
             
     def stop_process(self):
-        """Stop the current ani-cli process"""
+        """Stop the current ani-cli process and everything it started"""
+        if self.downloading:
+            # Partial data is kept, so the same download resumes next time
+            self.download_cancel.set()
+            if self.current_download:
+                self.current_download.cancel()
+        
+        if self.building_playlist:
+            self.playlist_cancel.set()
+        
+        with self.resolving_lock:
+            processes = [process for process in self.resolving_processes if process.poll() is None]
+            self.resolving_processes.clear()
         if self.current_process:
+            processes.append(self.current_process)
+        if not processes:
+            return  # No process running to stop
+        
+        self.update_status("Stopping...")
+        
+        def kill():
             try:
-                self.current_process.terminate()
-                self.update_status("Process stopped")
+                results = []
+                for process in processes:
+                    results += self.launcher.kill_tree(process)
+                for result in results:
+                    print(f"Stopped {result['name']} (pid {result['pid']}): {result['status']}")
+                self.root.after(0, lambda: self.update_status(f"Process stopped ({len(results)} processes)"))
             except Exception as e:
-                self.update_status("Error stopping process")
-        else:
-            pass  # No process running to stop
+                print(f"Error stopping process: {e}")
+                self.root.after(0, lambda: self.update_status("Error stopping process"))
+        
+        # Escalation can take a few seconds, keep the UI responsive
+        threading.Thread(target=kill, daemon=True).start()
             
     def update_status(self, message):
         """Update the status bar"""
@@ -1058,14 +3600,265 @@ class AniCliGUI:
     def run(self):
         """Start the GUI application"""
         # Check if Git Bash is available
-        if not os.path.exists(self.git_bash_path):
-            messagebox.showerror("Error", f"Git Bash not found at: {self.git_bash_path}")
+        if not os.path.exists(self.settings.bash_path):
+            messagebox.showerror("Error", f"Bash not found at: {self.settings.bash_path}\n"
+                                          f"Set bash_path in {Settings.default_path()}")
             return
             
         self.root.mainloop()
 
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    """JSON request handler for AniCliDaemon"""
+
+    LOCAL_HOSTS = ('localhost', '127.0.0.1', '[::1]')
+
+    def do_GET(self):
+        if not self._allowed():
+            return
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self._dispatch(self.server.daemon.handle_get, url.path, params)
+
+    def do_POST(self):
+        if not self._allowed():
+            return
+        # Browsers can only send cross-site POSTs without a preflight as form or text bodies
+        if self.headers.get('Content-Type', '').split(';')[0].strip().lower() != 'application/json':
+            self._send_json(415, {'error': 'Content-Type must be application/json'})
+            return
+        url = urlparse(self.path)
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': 'Request body must be JSON'})
+            return
+        self._dispatch(self.server.daemon.handle_post, url.path, body)
+
+    def _allowed(self) -> bool:
+        """Reject requests from web pages: foreign Origin headers and DNS-rebound Host names"""
+        port = self.server.server_address[1]
+        local_ip = self.connection.getsockname()[0]
+        allowed = {f"{host}:{port}" for host in self.LOCAL_HOSTS + (local_ip, f"[{local_ip}]")}
+        
+        host = (self.headers.get('Host') or '').lower()
+        if host not in allowed:
+            self._send_json(403, {'error': f'Host not allowed: {host}'})
+            return False
+        origin = self.headers.get('Origin')
+        if origin is not None and urlparse(origin).netloc.lower() not in allowed:
+            self._send_json(403, {'error': f'Origin not allowed: {origin}'})
+            return False
+        return True
+
+    def _dispatch(self, handler, path, params):
+        try:
+            status, payload = handler(path, params)
+        except Exception as e:
+            print(f"Daemon error handling {path}: {e}")
+            status, payload = 500, {'error': str(e)}
+        self._send_json(status, payload)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        print(f"Daemon: {self.address_string()} {format % args}")
+
+class AniCliDaemon:
+    """Headless server sharing one API session and cache between front ends"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or Settings.load()
+        self.host = self.settings.daemon_host
+        self.port = self.settings.daemon_port
+        self.api = AnimeSearchAPI(self.settings)
+        self.launcher = ProcessLauncher(self.settings)
+        self.history = WatchHistory()
+        self.airing_scheduler = AiringScheduler(self.api, self.history)
+        self.jobs = {}
+        self.job_ids = itertools.count(1)
+        self.jobs_lock = threading.Lock()
+        self.events = EventBus()
+        self.events.subscribe(self._on_job_event)
+        self.server = None
+
+    def handle_get(self, path: str, params: Dict):
+        """Serve read-only requests"""
+        if path == '/search':
+            query = params.get('q', '').strip()
+            if not query:
+                return 400, {'error': 'Missing q parameter'}
+            limit = self._int_param(params.get('limit', self.settings.search_limit))
+            if not limit:
+                return 400, {'error': 'limit must be a positive number'}
+            return 200, {'results': self.api.search_anime(query, limit)}
+        
+        if path == '/episodes':
+            if 'mal_id' not in params:
+                return 400, {'error': 'Missing mal_id parameter'}
+            mal_id = self._int_param(params['mal_id'])
+            if not mal_id:
+                return 400, {'error': 'mal_id must be a positive number'}
+            count = self.api.get_actual_episode_count(mal_id)
+            availability = EpisodeAvailability(count, self.api.get_available_episode_mask(mal_id))
+            return 200, {
+                'mal_id': mal_id,
+                'episode_count': count,
+                'available_count': availability.available_count(),
+                'next_unwatched': self.history.next_unwatched_episode(mal_id)
+            }
+        
+        if path == '/recent':
+            limit = self._int_param(params.get('limit', 10))
+            if not limit:
+                return 400, {'error': 'limit must be a positive number'}
+            return 200, {'results': self.history.recently_watched(limit)}
+        
+        if path == '/health':
+            return 200, {'hosts': self.api.health.snapshot()}
+        
+        if path == '/jobs':
+            with self.jobs_lock:
+                return 200, {'jobs': [self._job_info(job_id) for job_id in self.jobs]}
+        
+        return 404, {'error': f'Unknown path: {path}'}
+
+    def handle_post(self, path: str, body: Dict):
+        """Serve requests that start or stop ani-cli jobs"""
+        if path in ('/play', '/download'):
+            title = (body.get('title') or '').strip()
+            if not title:
+                return 400, {'error': 'Missing title'}
+            episode = str(body.get('episode') or "1").strip()
+            if not EPISODE_SPEC_PATTERN.match(episode):
+                return 400, {'error': f'Invalid episode: {episode!r}'}
+            mal_id = body.get('mal_id')
+            if mal_id is not None and not self._int_param(mal_id):
+                return 400, {'error': f'Invalid mal_id: {mal_id!r}'}
+            job_id = self.start_job(title, episode, download=(path == '/download'))
+            if mal_id is not None:
+                mal_id = self._int_param(mal_id)
+                if path == '/play':
+                    self.history.record({'mal_id': mal_id, 'title': title}, expand_episode_spec(episode))
+                self.airing_scheduler.follow(mal_id)
+            return 202, self._job_info(job_id)
+        
+        if path.startswith('/jobs/') and path.endswith('/stop'):
+            job_id = self._int_param(path.split('/')[2])
+            if not job_id:
+                return 400, {'error': f'Invalid job ID: {path.split("/")[2]!r}'}
+            with self.jobs_lock:
+                job = self.jobs.get(job_id)
+            if not job:
+                return 404, {'error': f'Unknown job: {job_id}'}
+            stopped = self.launcher.kill_tree(job['process'])
+            info = self._job_info(job_id)
+            info['stopped'] = stopped
+            return 200, info
+        
+        return 404, {'error': f'Unknown path: {path}'}
+
+    @staticmethod
+    def _int_param(value) -> Optional[int]:
+        """A positive integer from a query or body value, None if it isn't one"""
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            return None
+        return number if number > 0 else None
+
+    def start_job(self, title: str, episode: str, download: bool = False) -> int:
+        """Start ani-cli in the background and return its job ID"""
+        cmd = build_ani_cli_command(title, episode, download, self.settings)
+        print(f"Running command: {cmd}")
+        process = self.launcher.start(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True
+        )
+        
+        job_id = next(self.job_ids)
+        with self.jobs_lock:
+            self.jobs[job_id] = {'title': title, 'episode': episode, 'download': download,
+                                 'process': process, 'last_event': None, 'last_progress': None}
+        threading.Thread(target=self._follow_output, args=(job_id, process), daemon=True).start()
+        return job_id
+
+    def _follow_output(self, job_id: int, process):
+        """Parse a job's output and keep its latest events for /jobs"""
+        parser = AniCliOutputParser(job=job_id)
+        for line in process.stdout:
+            event = parser.parse_line(line)
+            if event:
+                self.events.publish(event)
+        process.wait()
+
+    def _on_job_event(self, event):
+        with self.jobs_lock:
+            job = self.jobs.get(event.job)
+            if job:
+                job['last_event'] = event.to_dict()
+                if event.kind == ProgressEvent.PROGRESS:
+                    job['last_progress'] = event.to_dict()
+
+    def _job_info(self, job_id: int) -> Dict:
+        job = self.jobs[job_id]
+        returncode = job['process'].poll()
+        return {
+            'id': job_id,
+            'title': job['title'],
+            'episode': job['episode'],
+            'download': job['download'],
+            'running': returncode is None,
+            'returncode': returncode,
+            'last_event': job['last_event'],
+            'progress': job['last_progress']
+        }
+
+    def serve_forever(self):
+        """Serve requests until interrupted"""
+        self.airing_scheduler.start()
+        self.server = ThreadingHTTPServer((self.host, self.port), DaemonRequestHandler)
+        self.server.daemon = self
+        print(f"Ani-CLI daemon listening on http://{self.host}:{self.server.server_address[1]}")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+            self.airing_scheduler.stop()
+
 def main():
-    app = AniCliGUI()
+    parser = argparse.ArgumentParser(description="Ani-CLI GUI")
+    parser.add_argument('--daemon', action='store_true', help="run headless and serve the API over HTTP/JSON")
+    parser.add_argument('--host', help="daemon bind address (default: daemon_host setting)")
+    parser.add_argument('--port', type=int, help="daemon port (default: daemon_port setting)")
+    parser.add_argument('--config', help=f"settings file (default: {Settings.default_path()})")
+    parser.add_argument('--http-mode', choices=FixtureAdapter.MODES,
+                        help="record API responses, replay them, or run offline from recordings")
+    args = parser.parse_args()
+    
+    settings = Settings.load(args.config)
+    if args.http_mode:
+        settings.http_mode = args.http_mode
+    
+    if args.daemon:
+        if args.host:
+            settings.daemon_host = args.host
+        if args.port:
+            settings.daemon_port = args.port
+        AniCliDaemon(settings).serve_forever()
+        return
+    
+    app = AniCliGUI(settings)
     app.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+"""Benchmark AniCliOutputParser against recorded ani-cli/downloader output.
+
+Usage:
+    python benchmarks/bench_output_parser.py [--repeat 50] [--max-us-per-line 20]
+"""
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ani_cli_gui import AniCliOutputParser  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_lines(path):
+    """Split a fixture the way run_ani_cli_command sees it (\\r counts as a line break)"""
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(io.StringIO(f.read(), newline=None))
+
+
+def bench_fixture(path, repeat):
+    lines = read_lines(path)
+    events = Counter()
+
+    # One pass to count events, then timed passes
+    parser = AniCliOutputParser()
+    for line in lines:
+        event = parser.parse_line(line)
+        if event:
+            events[event.kind] += 1
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parser = AniCliOutputParser()
+        for line in lines:
+            parser.parse_line(line)
+    elapsed = time.perf_counter() - start
+
+    us_per_line = elapsed / (repeat * len(lines)) * 1e6 if lines else 0.0
+    return len(lines), us_per_line, events
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--repeat", type=int, default=50, help="passes over each fixture")
+    arg_parser.add_argument("--max-us-per-line", type=float, default=None,
+                            help="exit non-zero if any fixture parses slower than this")
+    args = arg_parser.parse_args()
+
+    failed = False
+    print(f"{'fixture':<24} {'lines':>7} {'us/line':>9} {'lines/s':>11}  events")
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.log"))):
+        count, us_per_line, events = bench_fixture(path, args.repeat)
+        lines_per_second = 1e6 / us_per_line if us_per_line else float("inf")
+        summary = ", ".join(f"{kind}={n}" for kind, n in sorted(events.items()))
+        print(f"{os.path.basename(path):<24} {count:>7} {us_per_line:>9.2f} {lines_per_second:>11.0f}  {summary}")
+        if args.max_us_per_line is not None and us_per_line > args.max_us_per_line:
+            failed = True
+
+    if failed:
+        print(f"FAIL: slower than {args.max_us_per_line} us/line")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""Benchmark how long AniCliGUI and EpisodeWindow operations block the Tk main loop.
+
+Runs the real GUI headlessly (under Xvfb when no display is available) with a mocked
+AnimeSearchAPI, so no network or ani-cli is needed. For each operation and item count it
+records main-loop stall time, live widget count and memory growth, and compares them
+with a stored baseline.
+
+Exits 0 with no regressions, 1 on regressions and SKIP_EXIT_CODE (77) when there is
+nothing to compare: no baseline recorded on this machine, or no display to run on.
+
+Usage:
+    python benchmarks/bench_ui.py [--sizes 10 100 1000] [--repeat 3] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "bench_ui.json")
+SKIP_EXIT_CODE = 77  # Not a pass and not a regression, as in automake test suites
+
+# Keep history, library and arc caches out of the user's real ~/.ani-cli-gui
+HOME_DIR = tempfile.mkdtemp(prefix="bench-ui-")
+os.environ["HOME"] = os.environ["USERPROFILE"] = HOME_DIR
+sys.path.insert(0, ROOT_DIR)
+
+
+def skip(reason):
+    print(f"SKIP: {reason}")
+    sys.exit(SKIP_EXIT_CODE)
+
+
+def start_display():
+    """Start Xvfb if there is no display to draw on; returns the process or None"""
+    if sys.platform != "linux" or os.environ.get("DISPLAY"):
+        return None
+    if not shutil.which("Xvfb"):
+        skip("no DISPLAY and Xvfb is not installed")
+
+    for number in range(99, 120):
+        if not os.path.exists(f"/tmp/.X11-unix/X{number}"):
+            break
+    process = subprocess.Popen(["Xvfb", f":{number}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while not os.path.exists(f"/tmp/.X11-unix/X{number}"):
+        if process.poll() is not None or time.monotonic() > deadline:
+            sys.exit("Xvfb did not start")
+        time.sleep(0.05)
+    os.environ["DISPLAY"] = f":{number}"
+    return process
+
+
+class MockAnimeSearchAPI:
+    """Stands in for AnimeSearchAPI with generated results and no network"""
+
+    def __init__(self, settings=None):
+        import ani_cli_gui
+        from PIL import Image
+        self.settings = settings or ani_cli_gui.Settings()
+        self.cache = ani_cli_gui.ResponseCache(self.settings.cache_max_entries)
+        self.episode_count_ttl = self.settings.episode_count_ttl
+        self.image = Image.new("RGB", (self.settings.image_width, self.settings.image_height), "gray")
+        self.episode_counts = {}
+
+    def search_anime(self, query, limit=None, deadline=None):
+        return make_results(limit or self.settings.search_limit)
+
+    def get_anilist_media_batch(self, mal_ids, include_schedule=False, refresh=False, failed=None):
+        return {}
+
+    def load_image_from_url(self, url, size=None):
+        return self.image
+
+    def get_cached_episode_data(self, mal_id):
+        return self.episode_counts.get(mal_id, 12), 0
+
+    def prefetch_episode_data(self, mal_id):
+        return self.get_cached_episode_data(mal_id)
+
+    def get_anime_details(self, mal_id):
+        return {}
+
+    def get_actual_episode_count(self, mal_id):
+        return self.episode_counts.get(mal_id, 12)
+
+    def get_available_episode_mask(self, mal_id):
+        return 0
+
+    def get_jikan_episodes(self, mal_id, max_pages=20):
+        return []
+
+
+def make_results(count):
+    return [{
+        'mal_id': 100000 + index,
+        'title': f"Benchmark Anime {index}",
+        'title_english': f"Benchmark Anime {index}",
+        'episodes': 12,
+        'score': 7.5,
+        'year': 2020,
+        'image_url': f"https://example.invalid/{index}.jpg",
+    } for index in range(count)]
+
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def measure(app, operation, settle=None):
+    """Run operation on the main thread, then pump events until idle or settle() is true
+
+    The stall is the operation itself plus the time spent inside update(), i.e. the time
+    the main loop could not have reacted to input.
+    """
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.clear_traces()  # Python < 3.9, also resets the peak
+    memory_before = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    operation()
+    blocked = time.perf_counter() - start
+    longest = blocked
+
+    # Callbacks posted by worker threads (e.g. cover images) arrive over time
+    deadline = time.monotonic() + 10
+    idle_since = time.monotonic()
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        app.root.update()
+        spent = time.perf_counter() - start
+        blocked += spent
+        longest = max(longest, spent)
+        if spent > 0.001:
+            idle_since = time.monotonic()
+        if settle and not settle():
+            time.sleep(0.005)
+            continue
+        if time.monotonic() - idle_since > 0.05:
+            break
+        time.sleep(0.005)
+
+    memory_after, memory_peak = tracemalloc.get_traced_memory()
+    return {
+        'stall_ms': round(blocked * 1000, 2),
+        'longest_ms': round(longest * 1000, 2),
+        'widgets': count_widgets(app.root),
+        'memory_kb': round((memory_after - memory_before) / 1024, 1),
+        'peak_kb': round((memory_peak - memory_before) / 1024, 1),
+    }
+
+
+def bench_search_results(app, size):
+    """_update_search_results and _highlight_selected_result for size results"""
+    results = make_results(size)
+    images_shown = [0]
+    display_image = app._display_image
+
+    def counting_display_image(*args, **kwargs):
+        images_shown[0] += 1
+        return display_image(*args, **kwargs)
+    app._display_image = counting_display_image
+
+    def clear():
+        for widget in app.results_scrollable.winfo_children():
+            widget.destroy()
+        app.root.update()
+
+    clear()
+    metrics = {'update_search_results': measure(
+        app, lambda: app._update_search_results(results), lambda: images_shown[0] >= size)}
+    last_frame = app.results_scrollable.winfo_children()[-1]
+    metrics['highlight_selected_result'] = measure(
+        app, lambda: app._highlight_selected_result(last_frame, results[-1]))
+    clear()
+    app._display_image = display_image
+    return metrics
+
+
+def bench_episode_window(app, size):
+    """Opening an EpisodeWindow on a size-episode show, then paging and selecting"""
+    import ani_cli_gui
+    anime = make_results(1)[0]
+    anime['mal_id'] = 200000 + size
+    app.api.episode_counts[anime['mal_id']] = size
+
+    windows = []
+    metrics = {'episode_window_open': measure(
+        app, lambda: windows.append(ani_cli_gui.EpisodeWindow(app, anime, app.api)))}
+    window = windows[0]
+
+    # Page size grows with the benchmark size so the page holds every episode
+    def load_full_page():
+        window.episodes_per_page = size
+        window.current_page = 1
+        window.load_current_page()
+    metrics['load_current_page'] = measure(app, load_full_page)
+
+    last = max(window.episode_frames)
+    metrics['select_episode'] = measure(
+        app, lambda: window.select_episode(window.episode_frames[last], ani_cli_gui.EpisodeView(last)))
+    metrics['load_episode_range'] = measure(app, lambda: window.load_episode_range_by_numbers(1, size))
+
+    window.window.destroy()
+    app.root.update()
+    return metrics
+
+
+def run(sizes, repeat):
+    import ani_cli_gui
+    ani_cli_gui.AnimeSearchAPI = MockAnimeSearchAPI
+
+    settings = ani_cli_gui.Settings()
+    settings.download_dir = os.path.join(HOME_DIR, "downloads")
+    settings.search_limit = max(sizes)
+    app = ani_cli_gui.AniCliGUI(settings)
+    app.root.update()
+
+    tracemalloc.start()
+    results = {}
+    for size in sizes:
+        runs = []
+        for _ in range(repeat):
+            metrics = bench_search_results(app, size)
+            metrics.update(bench_episode_window(app, size))
+            runs.append(metrics)
+
+        # Median timings across repeats; widget and memory figures from the last run
+        for operation in runs[-1]:
+            merged = dict(runs[-1][operation])
+            for key in ('stall_ms', 'longest_ms'):
+                merged[key] = round(statistics.median(run[operation][key] for run in runs), 2)
+            results.setdefault(operation, {})[str(size)] = merged
+
+    tracemalloc.stop()
+    app.root.destroy()
+    return results
+
+
+def compare(results, baseline, tolerance, min_stall_ms, min_memory_kb):
+    """Regressions against the baseline as human readable strings"""
+    regressions = []
+    for operation, by_size in results.items():
+        for size, metrics in by_size.items():
+            name = f"{operation}[{size}]"
+            base = baseline.get(operation, {}).get(size)
+            if not base:
+                regressions.append(f"{name}: not in the baseline, record it with --update-baseline")
+                continue
+            if (metrics['stall_ms'] > base['stall_ms'] * (1 + tolerance)
+                    and metrics['stall_ms'] - base['stall_ms'] > min_stall_ms):
+                regressions.append(f"{name}: stall {base['stall_ms']} -> {metrics['stall_ms']} ms")
+            if metrics['widgets'] > base['widgets']:
+                regressions.append(f"{name}: widgets {base['widgets']} -> {metrics['widgets']}")
+            if (metrics['memory_kb'] > base['memory_kb'] * (1 + tolerance)
+                    and metrics['memory_kb'] - base['memory_kb'] > min_memory_kb):
+                regressions.append(f"{name}: memory {base['memory_kb']} -> {metrics['memory_kb']} KB")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000],
+                            help="result and episode counts to benchmark")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="runs per size, timings are the median")
+    arg_parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    arg_parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    arg_parser.add_argument("--tolerance", type=float, default=0.5,
+                            help="allowed relative slowdown or memory growth (0.5 = 50%%)")
+    arg_parser.add_argument("--min-stall-ms", type=float, default=5.0,
+                            help="ignore stall increases smaller than this")
+    arg_parser.add_argument("--min-memory-kb", type=float, default=256.0,
+                            help="ignore memory increases smaller than this")
+    args = arg_parser.parse_args()
+
+    display = None
+    try:
+        display = start_display()
+        results = run(sorted(set(args.sizes)), args.repeat)
+    finally:
+        if display:
+            display.terminate()
+        shutil.rmtree(HOME_DIR, ignore_errors=True)
+
+    print(f"{'operation':<28} {'size':>5} {'stall ms':>9} {'longest ms':>11} {'widgets':>8} {'memory KB':>10}")
+    for operation, by_size in results.items():
+        for size, metrics in by_size.items():
+            print(f"{operation:<28} {size:>5} {metrics['stall_ms']:>9.2f} {metrics['longest_ms']:>11.2f} "
+                  f"{metrics['widgets']:>8} {metrics['memory_kb']:>10.1f}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        # Timings are machine specific, so each machine records its own baseline
+        skip(f"no baseline at {args.baseline}, record one on this machine with --update-baseline")
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.tolerance, args.min_stall_ms, args.min_memory_kb)
+    if regressions:
+        print("FAIL: regressions against baseline")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("OK: no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
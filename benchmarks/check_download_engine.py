@@ -0,0 +1,222 @@
+"""Check DownloadEngine against a local HTTP server: resume, HLS segments, errors and checksums.
+
+Serves a range-capable file and an HLS stream from 127.0.0.1, injects 500s into
+segment requests and verifies that downloads retry, stop early and resume.
+
+Usage:
+    python benchmarks/check_download_engine.py [--segments 60]
+"""
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ani_cli_gui import DownloadEngine, DownloadJob, Settings  # noqa: E402
+
+SEGMENT_SIZE = 32 * 1024
+SEGMENT_LATENCY = 0.05  # Seconds per segment response, so a failure lands while segments are queued
+FILE_SIZE = 2 * 1024 * 1024
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Serves /file.bin, /master.m3u8, /media.m3u8, /fmp4.m3u8 and /seg/<n>.ts, counting requests"""
+
+    def __init__(self, segments):
+        super().__init__(('127.0.0.1', 0), FixtureHandler)
+        self.file_data = os.urandom(FILE_SIZE)
+        self.segment_data = [os.urandom(SEGMENT_SIZE) for _ in range(segments)]
+        self.failures = {}  # path -> remaining 500 responses (-1 = always)
+        self.requests = Counter()
+        self.range_requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def segment_requests(self):
+        with self.lock:
+            return sum(count for path, count in self.requests.items() if path.startswith('/seg/'))
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests[self.path] += 1
+            remaining = server.failures.get(self.path, 0)
+            if remaining:
+                server.failures[self.path] = remaining - 1 if remaining > 0 else -1
+        if remaining:
+            self.send_error(500)
+            return
+
+        if self.path == '/master.m3u8':
+            self._send_text("#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=800000\nlow.m3u8\n"
+                            "#EXT-X-STREAM-INF:BANDWIDTH=2000000\nmedia.m3u8\n")
+        elif self.path == '/media.m3u8':
+            lines = ["#EXTM3U", "#EXT-X-TARGETDURATION:4"]
+            for index in range(len(server.segment_data)):
+                lines += ["#EXTINF:4.0,", f"seg/{index}.ts"]
+            self._send_text("\n".join(lines + ["#EXT-X-ENDLIST"]) + "\n")
+        elif self.path == '/fmp4.m3u8':
+            self._send_text('#EXTM3U\n#EXT-X-MAP:URI="init.mp4"\n#EXTINF:4.0,\nseg/0.m4s\n#EXT-X-ENDLIST\n')
+        elif self.path.startswith('/seg/'):
+            time.sleep(SEGMENT_LATENCY)
+            self._send_bytes(server.segment_data[int(re.search(r'\d+', self.path).group(0))])
+        elif self.path == '/file.bin':
+            self._send_bytes(server.file_data)
+        else:
+            self.send_error(404)
+
+    def _send_text(self, text):
+        body = text.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.apple.mpegurl')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_bytes(self, data):
+        etag = '"%s"' % hashlib.md5(data).hexdigest()
+        match = re.match(r'bytes=(\d+)-', self.headers.get('Range') or '')
+        if match and self.headers.get('If-Range', etag) == etag:
+            start = int(match.group(1))
+            with self.server.lock:
+                self.server.range_requests += 1
+            if start >= len(data):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(data) - 1}/{len(data)}')
+            data = data[start:]
+        else:
+            self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_engine(workers=4):
+    settings = Settings()
+    settings.download_workers = workers
+    engine = DownloadEngine(settings)
+    engine.RETRY_BACKOFF = 0.01
+    return engine
+
+
+def check_file_resume(server, directory):
+    """Cancel a direct download half way, then resume it with a range request"""
+    path = os.path.join(directory, 'file.bin')
+    job = DownloadJob(f"{server.url}/file.bin", path)
+    make_engine().download(job, progress=lambda j: j.done_bytes >= FILE_SIZE // 2 and j.cancel())
+    assert job.state == 'cancelled', job.state
+    assert os.path.exists(path + '.part'), "partial data was not kept"
+
+    job = DownloadJob(f"{server.url}/file.bin", path,
+                      expected_sha256=hashlib.sha256(server.file_data).hexdigest())
+    make_engine().download(job)
+    assert job.state == 'done', (job.state, job.error)
+    assert server.range_requests >= 1, "resume did not send a range request"
+    with open(path, 'rb') as f:
+        assert f.read() == server.file_data, "resumed file differs"
+    assert os.path.exists(path + '.sha256'), "no checksum file"
+
+
+def check_checksum_mismatch(server, directory):
+    """A wrong expected checksum fails the job and removes the file"""
+    path = os.path.join(directory, 'bad.bin')
+    job = DownloadJob(f"{server.url}/file.bin", path, expected_sha256='0' * 64)
+    make_engine().download(job)
+    assert job.state == 'failed', job.state
+    assert not os.path.exists(path), "file with a bad checksum was kept"
+
+
+def check_hls_transient_error(server, directory):
+    """A segment that fails once is retried and the episode still completes"""
+    server.failures = {'/seg/2.ts': 1}
+    path = os.path.join(directory, 'retry.ts')
+    job = make_engine().download(DownloadJob(f"{server.url}/master.m3u8", path))
+    assert job.state == 'done', (job.state, job.error)
+    with open(path, 'rb') as f:
+        assert f.read() == b''.join(server.segment_data), "joined segments differ"
+
+
+def check_hls_fmp4_rejected(server, directory):
+    """fMP4 streams fail up front instead of being joined into a corrupt .ts"""
+    server.failures = {}
+    server.requests.clear()
+    path = os.path.join(directory, 'fmp4.ts')
+    job = make_engine().download(DownloadJob(f"{server.url}/fmp4.m3u8", path))
+    assert job.state == 'failed', job.state
+    assert 'fMP4' in str(job.error), job.error
+    assert server.segment_requests() == 0, "segments were fetched"
+    assert not os.path.exists(path), "a file was written"
+
+
+def check_hls_failure_and_resume(server, directory):
+    """A segment that keeps failing stops the job early; the next run fetches only what is missing"""
+    segments = len(server.segment_data)
+    server.failures = {'/seg/2.ts': -1}
+    server.requests.clear()
+    path = os.path.join(directory, 'resume.ts')
+    job = make_engine().download(DownloadJob(f"{server.url}/master.m3u8", path))
+    assert job.state == 'failed', job.state
+    fetched = server.segment_requests()
+    assert fetched < segments, f"all {segments} segments were requested after the failure"
+
+    server.failures = {}
+    server.requests.clear()
+    job = make_engine().download(DownloadJob(f"{server.url}/master.m3u8", path))
+    assert job.state == 'done', (job.state, job.error)
+    assert server.segment_requests() < segments, "resume downloaded finished segments again"
+    with open(path, 'rb') as f:
+        assert f.read() == b''.join(server.segment_data), "resumed stream differs"
+    assert not os.path.exists(path + '.parts'), "segment directory was not cleaned up"
+    return fetched
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--segments", type=int, default=60, help="segments in the HLS fixture")
+    args = arg_parser.parse_args()
+
+    server = FixtureServer(args.segments)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    directory = tempfile.mkdtemp(prefix="check-download-")
+
+    failed = False
+    try:
+        for check in (check_file_resume, check_checksum_mismatch, check_hls_transient_error,
+                      check_hls_fmp4_rejected, check_hls_failure_and_resume):
+            try:
+                result = check(server, directory)
+                detail = f" ({result} segment requests before stopping)" if result else ""
+                print(f"PASS {check.__name__}{detail}")
+            except AssertionError as e:
+                failed = True
+                print(f"FAIL {check.__name__}: {e}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Check ProcessLauncher.kill_tree against stub ani-cli scripts (Linux/macOS).
+
+One stub ignores SIGTERM and leaves children behind, including one moved to its own
+process group; the other exits politely. kill_tree must leave no process of either
+tree running, escalating to SIGKILL only for the stubborn one.
+
+Usage:
+    python benchmarks/check_process_launcher.py [--timeout 1.0]
+"""
+import argparse
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ani_cli_gui import ProcessLauncher, Settings  # noqa: E402
+
+STUBBORN_STUB = """#!/bin/bash
+# Ignores SIGTERM, like a player stuck in a blocking read
+trap '' TERM
+sleep 300 &
+(trap '' TERM; sleep 300) &
+set -m  # Background jobs from here on get their own process group
+sleep 300 &
+echo "started $ANI_CLI_DOWNLOAD_DIR"
+wait
+"""
+
+POLITE_STUB = """#!/bin/bash
+sleep 300 &
+echo "started $ANI_CLI_DOWNLOAD_DIR"
+wait
+"""
+
+
+def start_stub(launcher, stub_dir, name):
+    process = launcher.start(f'PATH={shlex.quote(stub_dir)}:"$PATH"; {name}',
+                             stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline().strip()  # Children are running once this arrives
+    return process, line
+
+
+def check_stubborn_tree(launcher, stub_dir, timeout):
+    """A tree ignoring SIGTERM is force killed shortly after the grace period"""
+    process, line = start_stub(launcher, stub_dir, 'stubborn-ani-cli')
+    assert line == f"started {launcher.settings.download_dir}", f"unexpected output: {line!r}"
+    children = launcher.descendants(process)
+    assert len(children) >= 3, f"expected the stub and its sleeps, found {children}"
+
+    start = time.monotonic()
+    results = launcher.kill_tree(process, timeout=timeout)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < timeout + 2, f"kill_tree took {elapsed:.1f}s"
+    assert any(result['status'] == 'killed' for result in results), f"nothing was force killed: {results}"
+    survivors = [child for child in children if launcher._is_alive(child['pid'])]
+    assert not survivors, f"still running: {survivors}"
+    return f"{len(results)} processes stopped in {elapsed:.2f}s"
+
+
+def check_polite_tree(launcher, stub_dir, timeout):
+    """A tree that honours SIGTERM is stopped without escalating"""
+    process, _ = start_stub(launcher, stub_dir, 'polite-ani-cli')
+    children = launcher.descendants(process)
+
+    start = time.monotonic()
+    results = launcher.kill_tree(process, timeout=timeout)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < timeout, f"waited {elapsed:.1f}s for a tree that exits on SIGTERM"
+    assert not any(result['status'] == 'killed' for result in results), f"force killed: {results}"
+    survivors = [child for child in children if launcher._is_alive(child['pid'])]
+    assert not survivors, f"still running: {survivors}"
+    return f"{len(results)} processes stopped in {elapsed:.2f}s"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--timeout", type=float, default=1.0, help="grace period before SIGKILL")
+    args = arg_parser.parse_args()
+
+    if sys.platform == "win32":
+        sys.exit("kill_tree uses taskkill on Windows; this check needs a POSIX system")
+
+    stub_dir = tempfile.mkdtemp(prefix="check-launcher-")
+    for name, script in (('stubborn-ani-cli', STUBBORN_STUB), ('polite-ani-cli', POLITE_STUB)):
+        path = os.path.join(stub_dir, name)
+        with open(path, 'w') as f:
+            f.write(script)
+        os.chmod(path, 0o755)
+
+    settings = Settings()
+    settings.download_dir = os.path.join(stub_dir, "downloads")
+    launcher = ProcessLauncher(settings)
+
+    failed = False
+    try:
+        for check in (check_stubborn_tree, check_polite_tree):
+            try:
+                print(f"PASS {check.__name__} ({check(launcher, stub_dir, args.timeout)})")
+            except AssertionError as e:
+                failed = True
+                print(f"FAIL {check.__name__}: {e}")
+    finally:
+        shutil.rmtree(stub_dir, ignore_errors=True)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()